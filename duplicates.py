@@ -0,0 +1,314 @@
+import os
+import io
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+# Ile bajtów z początku i z końca pliku bierze szybki skrót
+FAST_HASH_CHUNK = 64 * 1024
+# Rozmiar bloku przy liczeniu pełnego skrótu
+FULL_HASH_BLOCK = 1024 * 1024
+
+# dHash porównuje sąsiednie piksele obrazu 9x8 w skali szarości - 64 bity
+DHASH_SIZE = 8
+# Maksymalna liczba różnych bitów dHash, przy której zdjęcia uznajemy za prawie identyczne
+NEAR_DUPLICATE_DISTANCE = 4
+# Średnia różnica jasności sąsiednich pikseli obrazu 9x8, poniżej której zdjęcie uznajemy za płaskie
+# (czarna lub biała klatka, czyste niebo, szara karta) - jego dHash to szum, a nie treść
+DHASH_MIN_CONTRAST = 2.0
+# Skrót z mniej niż tyloma ustawionymi (albo zgaszonymi) bitami to sam gradient bez szczegółów
+DHASH_MIN_BITS = 8
+# Skróty różniące się o co najwyżej NEAR_DUPLICATE_DISTANCE bitów mają co najmniej jedno
+# identyczne pasmo z NEAR_DUPLICATE_DISTANCE + 1, więc porównujemy tylko pary ze wspólnym pasmem
+NEAR_DUPLICATE_BANDS = NEAR_DUPLICATE_DISTANCE + 1
+# Tyle miniaturek naraz czytamy z cache przy liczeniu skrótów
+DUPLICATE_BATCH = 1000
+# Dekodowanie JPEG w Pillow zwalnia GIL, więc skróty liczymy w puli wątków
+DUPLICATE_THREADS = os.cpu_count() or 1
+# Grupa, do której trafiają nadmiarowe kopie po wyszukaniu duplikatów
+DUPLICATES_GROUP = 'duplicates'
+# Rodzaje nadmiarowych kopii w kolumnie dup_kind: identyczny plik albo podobne zdjęcie
+# (seria, edycja, inna kompresja - to wciąż może być inne zdjęcie)
+EXACT_DUPLICATE = 'exact'
+NEAR_DUPLICATE = 'near'
+
+
+def fast_hash(filepath, size):
+    """Skrót z rozmiaru, początku i końca pliku - wystarcza, by odsiać prawie wszystkie różne pliki."""
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(filepath, 'rb') as f:
+        digest.update(f.read(FAST_HASH_CHUNK))
+        if size > 2 * FAST_HASH_CHUNK:
+            f.seek(-FAST_HASH_CHUNK, os.SEEK_END)
+            digest.update(f.read(FAST_HASH_CHUNK))
+    return digest.hexdigest()
+
+
+def full_hash(filepath):
+    digest = hashlib.blake2b(digest_size=32)
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(FULL_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dhash(data):
+    """
+    Skrót percepcyjny (dHash) miniaturki JPEG jako liczba 64-bitowa albo None - także dla
+    zdjęć płaskich, których nie da się wiarygodnie porównywać po skrócie.
+    """
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.draft('L', (DHASH_SIZE + 1, DHASH_SIZE))  # JPEG dekodowany od razu w skali 1/8
+        pixels = np.asarray(img.convert('L').resize((DHASH_SIZE + 1, DHASH_SIZE), Image.BILINEAR), dtype=np.int16)
+    except Exception:
+        return None
+    gradient = pixels[:, 1:] - pixels[:, :-1]
+    if np.abs(gradient).mean() < DHASH_MIN_CONTRAST:
+        return None
+    bits = gradient > 0
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a, b):
+    """Odległości Hamminga między tablicami skrótów uint64 (element po elemencie)."""
+    return np.bitwise_count(np.bitwise_xor(a, b))
+
+
+def near_duplicate_pairs(hashes, max_distance=NEAR_DUPLICATE_DISTANCE):
+    """
+    Zwraca pary indeksów (a, b) skrótów odległych o co najwyżej max_distance bitów.
+    Skróty prawie stałe (mniej niż DHASH_MIN_BITS ustawionych lub zgaszonych bitów) pomijamy -
+    mają je zdjęcia bez szczegółów, które różnią się treścią, a nie tylko kompresją.
+    Identyczne skróty pozostałych zdjęć łączymy od razu, a wśród różnych dla każdego pasma
+    sortujemy skróty po jego wartości i porównujemy tylko sąsiadów z tą samą wartością
+    pasma - wszystko wektorowo w NumPy.
+    """
+    bits = np.bitwise_count(hashes)
+    informative = np.flatnonzero((bits >= DHASH_MIN_BITS) & (bits <= 64 - DHASH_MIN_BITS))
+    unique, first, inverse = np.unique(hashes[informative], return_index=True, return_inverse=True)
+    first = informative[first]  # pozycje w hashes, a nie w informative
+    found_a, found_b = [informative], [first[inverse]]
+
+    bounds = np.linspace(0, 64, max_distance + 2).astype(np.uint64)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        mask = np.uint64((1 << int(end - start)) - 1)
+        keys = (unique >> start) & mask
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        # idx - pozycje, których pasmo jest równe pasmu elementu o offset dalej
+        idx = np.arange(len(order) - 1)
+        offset = 1
+        while idx.size:
+            idx = idx[idx + offset < len(order)]
+            idx = idx[sorted_keys[idx] == sorted_keys[idx + offset]]
+            a, b = order[idx], order[idx + offset]
+            close = hamming(unique[a], unique[b]) <= max_distance
+            found_a.append(first[a[close]])
+            found_b.append(first[b[close]])
+            offset += 1
+
+    return np.concatenate(found_a), np.concatenate(found_b)
+
+
+def connected_groups(count, a, b):
+    """
+    Łączy pary w grupy (spójne składowe). Zwraca dla każdego elementu numer grupy,
+    czyli najmniejszy indeks w grupie.
+    """
+    labels = np.arange(count)
+    if len(a) == 0:
+        return labels
+    while True:
+        smaller = np.minimum(labels[a], labels[b])
+        updated = labels.copy()
+        np.minimum.at(updated, a, smaller)
+        np.minimum.at(updated, b, smaller)
+        updated = updated[updated]  # skracanie ścieżek
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+class Deduplicator:
+    """
+    Wykrywa pliki o tej samej zawartości pod różnymi ścieżkami (np. ten sam katalog
+    skopiowany z karty i z kopii zapasowej telefonu). Pliki są najpierw grupowane po rozmiarze,
+    więc plik o unikalnym rozmiarze nie jest w ogóle czytany. Dopiero przy zgodnym rozmiarze
+    liczony jest szybki skrót (początek i koniec pliku), a przy jego zgodności - pełny skrót.
+
+    Obiekt żyje przez całą sesję (wszystkie katalogi i zmiany z obserwowania),
+    ale w danej chwili używa go tylko jeden wątek ładowania.
+    """
+
+    def __init__(self):
+        self.by_size = {}  # rozmiar -> lista ścieżek plików zachowanych w sesji
+        self.sizes = {}  # ścieżka -> rozmiar
+        self.fast_hashes = {}
+        self.full_hashes = {}
+        self.duplicates = {}  # ścieżka duplikatu -> ścieżka zachowanego pliku
+        self.orphans = []  # duplikaty, których zachowany plik się zmienił (do ponownego wczytania)
+
+    def check(self, filepath, size):
+        """
+        Zwraca ścieżkę zachowanego pliku o tej samej zawartości albo None.
+        Plik, który nie jest duplikatem, zostaje zapamiętany jako zachowany.
+        """
+        if filepath in self.sizes:
+            # Plik zmieniony - porównujemy go od nowa, a jego dotychczasowe duplikaty trzeba wczytać ponownie
+            self.orphans.extend(self.remove(filepath))
+        self.duplicates.pop(filepath, None)
+
+        for candidate in self.by_size.get(size, ()):
+            try:
+                if self.get_fast_hash(candidate, size) != self.get_fast_hash(filepath, size):
+                    continue
+                if self.get_full_hash(candidate) == self.get_full_hash(filepath):
+                    self.duplicates[filepath] = candidate
+                    self.forget_hashes(filepath)
+                    return candidate
+            except OSError:
+                continue  # Plik zniknął lub jest nieczytelny - traktujemy jako różny
+
+        self.by_size.setdefault(size, []).append(filepath)
+        self.sizes[filepath] = size
+        return None
+
+    def take_orphans(self):
+        orphans, self.orphans = self.orphans, []
+        return orphans
+
+    def get_fast_hash(self, filepath, size):
+        if filepath not in self.fast_hashes:
+            self.fast_hashes[filepath] = fast_hash(filepath, size)
+        return self.fast_hashes[filepath]
+
+    def get_full_hash(self, filepath):
+        if filepath not in self.full_hashes:
+            self.full_hashes[filepath] = full_hash(filepath)
+        return self.full_hashes[filepath]
+
+    def forget_hashes(self, filepath):
+        self.fast_hashes.pop(filepath, None)
+        self.full_hashes.pop(filepath, None)
+
+    def remove(self, filepath):
+        """
+        Zapomina plik (usunięty lub zmieniony). Zwraca listę jego duplikatów -
+        nie są już reprezentowane w sesji, więc trzeba je wczytać ponownie.
+        """
+        self.duplicates.pop(filepath, None)
+        size = self.sizes.pop(filepath, None)
+        if size is None:
+            return []
+        self.by_size[size].remove(filepath)
+        if not self.by_size[size]:
+            del self.by_size[size]
+        self.forget_hashes(filepath)
+
+        orphans = [duplicate for duplicate, kept in self.duplicates.items() if kept == filepath]
+        for duplicate in orphans:
+            del self.duplicates[duplicate]
+        return orphans
+
+
+class DuplicateFinder(QObject):
+    """
+    Wyszukuje duplikaty wśród wczytanych plików (obiekt przenoszony do osobnego QThread).
+    Identyczne pliki wykrywa Deduplicator (rozmiar, potem skróty zawartości), a prawie
+    identyczne zdjęcia (inna kompresja, rozmiar, drobna edycja) - skróty dHash liczone
+    z miniaturek w cache i porównywane wektorowo jako tablica uint64.
+    Wynik ma kolumny dup_group (numer porządkowy pliku zachowywanego w grupie, -1 poza grupami),
+    dup_keep (False dla nadmiarowych kopii) oraz dup_kind (EXACT_DUPLICATE, gdy nadmiarowa kopia
+    ma tę samą zawartość co plik zachowany, NEAR_DUPLICATE dla podobnych zdjęć, '' dla pozostałych),
+    z kluczem 'Pełna ścieżka pliku'.
+    """
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(pd.DataFrame)
+
+    def __init__(self, df, thumbnail_cache):
+        super().__init__()
+        self.df = df[['Liczba porządkowa', 'Pełna ścieżka pliku', 'width', 'height']].copy()
+        self.thumbnail_cache = thumbnail_cache
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        paths = self.df['Pełna ścieżka pliku'].tolist()
+        count = len(paths)
+        pairs_a, pairs_b = [], []
+
+        # Identyczne pliki - większość ma unikalny rozmiar i nie jest nawet otwierana
+        deduplicator = Deduplicator()
+        positions = {}
+        for i, filepath in enumerate(paths):
+            if self._cancelled:
+                return
+            try:
+                size = os.stat(filepath).st_size
+            except OSError:
+                continue
+            positions[filepath] = i
+            kept = deduplicator.check(filepath, size)
+            if kept is not None:
+                pairs_a.append(i)
+                pairs_b.append(positions[kept])
+        self.progress.emit(20)
+
+        # Prawie identyczne zdjęcia - dHash z najmniejszej miniaturki
+        hashes = np.zeros(count, dtype=np.uint64)
+        valid = np.zeros(count, dtype=bool)
+        with ThreadPoolExecutor(max_workers=DUPLICATE_THREADS) as executor:
+            for start in range(0, count, DUPLICATE_BATCH):
+                if self._cancelled:
+                    return
+                batch = self.thumbnail_cache.get_many(paths[start:start + DUPLICATE_BATCH])
+                for i, value in enumerate(executor.map(lambda data: data and dhash(data), batch), start):
+                    if value is not None:
+                        hashes[i] = value
+                        valid[i] = True
+                self.progress.emit(20 + 70 * min(start + DUPLICATE_BATCH, count) // max(count, 1))
+
+        indices = np.flatnonzero(valid)
+        near_a, near_b = near_duplicate_pairs(hashes[indices])
+        a = np.concatenate([np.asarray(pairs_a, dtype=np.intp), indices[near_a]])
+        b = np.concatenate([np.asarray(pairs_b, dtype=np.intp), indices[near_b]])
+        labels = connected_groups(count, a, b)
+
+        # W każdej grupie zostaje plik o największej rozdzielczości (przy remisie - wcześniejszy)
+        pixels = self.df['width'].to_numpy(dtype=np.int64) * self.df['height'].to_numpy(dtype=np.int64)
+        order = np.lexsort((np.arange(count), -pixels, labels))
+        first = np.ones(count, dtype=bool)
+        first[1:] = labels[order][1:] != labels[order][:-1]
+        keep_position = np.empty(count, dtype=np.intp)  # grupa -> pozycja zachowywanego pliku
+        keep_position[labels[order][first]] = order[first]
+        sizes = np.bincount(labels, minlength=count)
+
+        numbers = self.df['Liczba porządkowa'].to_numpy()
+        in_group = sizes[labels] > 1
+        keep = ~in_group | (keep_position[labels] == np.arange(count))
+        # Wśród plików o tej samej zawartości jeden (wybrany jak plik zachowywany) reprezentuje je
+        # w grupie - pozostałe są identycznymi kopiami, nawet gdy reprezentant jest tylko podobnym zdjęciem
+        exact_labels = connected_groups(count, np.asarray(pairs_a, dtype=np.intp), np.asarray(pairs_b, dtype=np.intp))
+        exact_order = np.lexsort((np.arange(count), -pixels, exact_labels))
+        exact_first = np.ones(count, dtype=bool)
+        exact_first[1:] = exact_labels[exact_order][1:] != exact_labels[exact_order][:-1]
+        representative = np.empty(count, dtype=np.intp)
+        representative[exact_labels[exact_order][exact_first]] = exact_order[exact_first]
+        exact = representative[exact_labels] != np.arange(count)
+        result = pd.DataFrame({
+            'Pełna ścieżka pliku': paths,
+            'dup_group': np.where(in_group, numbers[keep_position[labels]], -1),
+            'dup_keep': keep,
+            'dup_kind': np.where(keep, '', np.where(exact, EXACT_DUPLICATE, NEAR_DUPLICATE)),
+        })
+        self.progress.emit(100)
+        self.finished.emit(result)
@@ -1,33 +1,52 @@
 import sys
 import os
 import pandas as pd
-import cv2
 from datetime import datetime
 
 import platform
 import subprocess
-import json
 
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QFileDialog, QScrollArea, QGridLayout, QDialog, QLabel, QMessageBox, QApplication
-from PyQt5.QtWidgets import QHBoxLayout, QSlider  # Do przycisków w odtwarzaczu video
-from PyQt5.QtCore import QCoreApplication # blokowanie zamrażania app podczas ładowania plików "program nie odpowiada"
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QFileDialog, QScrollArea, QDialog, QLabel, QMessageBox, QApplication
+from PyQt5.QtWidgets import QHBoxLayout, QSlider, QCheckBox  # Do przycisków w odtwarzaczu video
+from PyQt5.QtWidgets import QListView, QTreeView, QAbstractItemView
 from PyQt5.QtGui import QPixmap
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, QThread
 from PyQt5.QtCore import QUrl # Do odtwarzania video
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent # Do odtwarzania video
 from PyQt5.QtMultimediaWidgets import QVideoWidget # Do odtwarzania video
-from PIL import Image
-from PIL.ExifTags import TAGS
-import hashlib
+from ingest import IngestWorker, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS
+from thumbnail_cache import get_thumbnail_cache
+from thumbnail_grid import ThumbnailModel, ThumbnailView, FilePathRole, GRID_THUMBNAIL_SIZE, GRID_THUMBNAIL_MIN, GRID_THUMBNAIL_MAX
+from preview import PreviewLoader
+from watcher import DirectoryWatcher
+from duplicates import Deduplicator
 
 
 class ImageThumbnailViewer(QWidget):
-    files_loaded = pyqtSignal(pd.DataFrame)
+    files_loaded = pyqtSignal(pd.DataFrame)  # pierwsza porcja nowo wczytanego katalogu
+    files_appended = pyqtSignal(pd.DataFrame)  # kolejne porcje tego samego katalogu
+    files_updated = pyqtSignal(pd.DataFrame)  # pliki nowe lub zmienione, wykryte przez obserwowanie katalogu
+    files_removed = pyqtSignal(list)  # ścieżki plików usuniętych z obserwowanego katalogu
     loading_progress = pyqtSignal(int)
     group_updated = pyqtSignal(pd.DataFrame)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, max_workers=None):
         super().__init__(parent)
+        # Liczba procesów roboczych przy ładowaniu katalogu (None = liczba rdzeni)
+        self.max_workers = max_workers
+        # Trwały cache miniaturek współdzielony z wątkiem ładowania
+        self.thumbnail_cache = get_thumbnail_cache()
+        self.ingest_thread = None
+        self.ingest_worker = None
+        self.rows_loaded = 0  # liczba wierszy dostarczonych w bieżącym ładowaniu
+        self.preview_loader = None  # tworzony przy pierwszym podglądzie (potrzebny rozmiar ekranu)
+        self.watcher = None  # obserwowanie wczytanych katalogów
+        self.ingest_mode = None  # rodzaj trwającego ładowania (patrz start_ingest)
+        self.changed_paths = set()  # zmienione pliki czekające na zakończenie trwającego ładowania
+        self.watch_paths = set()  # pliki wczytywanego zestawu zmian, dla których nie przyszedł jeszcze wiersz
+        self.roots = []  # katalogi główne bieżącej sesji
+        self.pending_roots = []  # katalogi dodane w trakcie trwającego ładowania
+        self.deduplicator = None  # wykrywanie tych samych plików pod różnymi ścieżkami (cała sesja)
         self.initUI()
 
     def initUI(self):
@@ -35,167 +54,245 @@ class ImageThumbnailViewer(QWidget):
 
         self.openButton = QPushButton('Open Directory', self)
         self.openButton.clicked.connect(self.openDirectory)
-        self.layout.addWidget(self.openButton)
-
-        self.scrollArea = QScrollArea(self)
-        self.scrollArea.setWidgetResizable(True)
-        self.scrollWidget = QWidget(self)
-        self.scrollLayout = QGridLayout(self.scrollWidget)
-        self.scrollWidget.setLayout(self.scrollLayout)
-        self.scrollArea.setWidget(self.scrollWidget)
-        self.layout.addWidget(self.scrollArea)
+        self.addButton = QPushButton('Add Directory', self)
+        self.addButton.clicked.connect(self.addDirectory)
+        self.addButton.setEnabled(False)
+        directory_layout = QHBoxLayout()
+        directory_layout.addWidget(self.openButton)
+        directory_layout.addWidget(self.addButton)
+        self.layout.addLayout(directory_layout)
+
+        # Obserwowanie katalogu: nowe, usunięte i zmienione pliki są wczytywane bez pełnego przeładowania
+        self.watchCheckBox = QCheckBox('Watch directory for changes', self)
+        self.watchCheckBox.setChecked(True)
+        self.watchCheckBox.toggled.connect(self.on_watch_toggled)
+        self.layout.addWidget(self.watchCheckBox)
+
+        # Suwak rozmiaru miniaturek - korzysta z poziomów zapisanych w cache, bez ponownego wczytywania
+        size_layout = QHBoxLayout()
+        size_layout.addWidget(QLabel('Thumbnail size', self))
+        self.sizeSlider = QSlider(Qt.Horizontal, self)
+        self.sizeSlider.setRange(GRID_THUMBNAIL_MIN, GRID_THUMBNAIL_MAX)
+        self.sizeSlider.setValue(GRID_THUMBNAIL_SIZE)
+        size_layout.addWidget(self.sizeSlider)
+        self.layout.addLayout(size_layout)
+
+        # Siatka miniaturek: model trzyma ścieżki, widok rysuje tylko widoczne komórki
+        self.thumbnail_model = ThumbnailModel(self.thumbnail_cache, self)
+        self.thumbnail_view = ThumbnailView(self)
+        self.thumbnail_view.setModel(self.thumbnail_model)
+        self.thumbnail_view.clicked.connect(self.on_thumbnail_clicked)
+        self.thumbnail_view.preview_requested.connect(self.open_preview)
+        self.sizeSlider.valueChanged.connect(self.thumbnail_view.set_thumbnail_size)
+        self.layout.addWidget(self.thumbnail_view)
 
         self.setLayout(self.layout)
 
 
     def openDirectory(self):
-        file_dialog = QFileDialog(self, "Select Directory")
-        file_dialog.setFileMode(QFileDialog.Directory)
-        file_dialog.setOption(QFileDialog.DontUseNativeDialog, True)  # Wymusza niestandardowy dialog PyQt
-
-        if file_dialog.exec_() == QFileDialog.Accepted:
-            directory = file_dialog.selectedFiles()[0]  # Pobierz wybrany katalog
+        directory = self.select_directory()
+        if directory:
             self.loadImages(directory)  # Rozpocznij ładowanie plików
 
+    def addDirectory(self):
+        directories = self.select_directory(multiple=True)
+        if directories:
+            self.add_directory(directories)
 
+    def select_directory(self, multiple=False):
+        """Zwraca wybrany katalog albo None; z multiple=True - listę katalogów (zaznaczanie z Ctrl/Shift)."""
+        file_dialog = QFileDialog(self, "Select Directories" if multiple else "Select Directory")
+        file_dialog.setFileMode(QFileDialog.Directory)
+        file_dialog.setOption(QFileDialog.DontUseNativeDialog, True)  # Wymusza niestandardowy dialog PyQt
+        if multiple:
+            # Dialog PyQt pozwala zaznaczyć kilka katalogów po włączeniu zaznaczania w jego widokach
+            for view in file_dialog.findChildren((QListView, QTreeView)):
+                view.setSelectionMode(QAbstractItemView.ExtendedSelection)
 
-    def get_cache_path(self, filepath):
-        import platform
-        import os
-
-        # Wybór ścieżki w zależności od systemu operacyjnego
-        if platform.system() == "Windows":
-            base_cache_dir = os.path.join(os.getenv('LOCALAPPDATA'), 'PixTidy', 'cache')
-        elif platform.system() == "Linux":
-            base_cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'pixtidy')
-        else:
-            raise Exception("Unsupported operating system")
-
-        # Tworzenie katalogu cache, jeśli nie istnieje
-        if not os.path.exists(base_cache_dir):
-            os.makedirs(base_cache_dir)
-
-        # Tworzenie unikalnej nazwy pliku na podstawie ścieżki
-        import hashlib
-        hash_object = hashlib.md5(filepath.encode())
-        filename = hash_object.hexdigest() + '.png'
-
-        return os.path.join(base_cache_dir, filename)
-
+        if file_dialog.exec_() == QFileDialog.Accepted:
+            selected = file_dialog.selectedFiles()
+            return selected if multiple else selected[0]  # Pobierz wybrany katalog
+        return None
 
     def loadImages(self, directory):
-        image_data = []
-        total_files = sum([len(files) for r, d, files in os.walk(directory)])
-        current_file = 0
-        failed_files = []  # Lista do przechowywania ścieżek plików, które nie zostały wczytane
-
-        for root, dirs, files in os.walk(directory):
-            for filename in files:
-                #print(f'loadImage, filename: {filename}')
-                filepath = os.path.join(root, filename)
-                cache_path = self.get_cache_path(filepath)
-
-                # Obsługa obrazów
-                if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp')):
-                    #print('loadImages - photo')
-                    if not os.path.exists(cache_path):
-                        try:
-                            with Image.open(filepath) as img:
-                                img.thumbnail((100, 100))
-                                img.save(cache_path)
-                        except Exception as e:
-                            failed_files.append(f"{filepath}: Error creating thumbnail - {e}")
-                            continue  # Przechodzimy do następnego pliku
-
-                    try:
-                        metadata = self.get_image_metadata(filepath)
-                        # Sprawdzamy, czy są wymagane metadane (koordynaty, data i rozdzielczość)
-                        if self.is_valid_metadata(metadata):
-                            image_data.append(metadata)
-                        else:
-                            failed_files.append(
-                                f"{filepath}: Invalid metadata (Coordinates, Date, or Resolution missing or invalid)")
-                    except Exception as e:
-                        failed_files.append(f"{filepath}: Error loading image metadata - {e}")
-                        continue  # Przechodzimy do następnego pliku
-
-                # Obsługa wideo
-                elif filename.lower().endswith(('.mp4', '.avi', '.mov', '.mkv')):
-                    #print('loadImages - video')
-                    if not os.path.exists(cache_path):
-                        try:
-                            self.create_video_thumbnail(filepath, cache_path)
-                        except Exception as e:
-                            failed_files.append(f"{filepath}: Error creating video thumbnail - {e}")
-                            continue  # Przechodzimy do następnego pliku
-                    try:
-                        metadata = self.get_video_metadata(filepath)
-                        # Sprawdzamy, czy są wymagane metadane (koordynaty, data i rozdzielczość)
-                        if self.is_valid_metadata(metadata):
-                            image_data.append(metadata)
-                        else:
-                            failed_files.append(
-                                f"{filepath}: Invalid metadata (Coordinates, Date, or Resolution missing or invalid)")
-                    except Exception as e:
-                        failed_files.append(f"{filepath}: Error loading video metadata - {e}")
-                        continue  # Przechodzimy do następnego pliku
-
-                current_file += 1
-                progress = int((current_file / total_files) * 100)
-                self.loading_progress.emit(progress)
-
-                # Przetwarzanie zdarzeń co 100 plików, aby UI nie "zamrażało"
-                # Zapobiega wyskakiwaniu okienka "program nie odpowiada"
-                if current_file % 10 == 0:
-                    QCoreApplication.processEvents()
-
-        # Tworzenie DataFrame z metadanych obrazów i wideo
-        df = pd.DataFrame(image_data)
-
-        if df.empty:
-            self.show_empty_df_message()  # Wywołaj okno dialogowe, jeśli df jest pusty
-
-        if not df.empty:
-            df.index += 1  # Numerowanie od 1
-            df.insert(0, 'Liczba porządkowa', df.index)
-
-            # Dodanie kolumny Grupa i ustawienie wartości domyślnych
-            df['Grupa'] = 'no category'
-
-            # Dodanie kolumn map_mark i date_mark, domyślnie ustawionych na True
-            df['map_mark'] = True
-            df['date_mark'] = True
-
-            # Emitowanie sygnału po zakończeniu ładowania plików
-            self.loading_progress.emit(100)
+        """
+        Rozpoczyna nową sesję z katalogiem (lub listą katalogów) i uruchamia ładowanie w tle.
+        Miniaturki i metadane są tworzone w puli procesów przez IngestWorker,
+        a GUI dostaje sygnały postępu i kolejne porcje wierszy, gdy tylko są gotowe.
+        """
+        if self.ingest_thread is not None and self.ingest_mode != 'watch':
+            return  # Ładowanie już trwa
+        self.stop_loading()
+
+        directories = [directory] if isinstance(directory, str) else list(directory)
+        self.roots = directories
+        self.pending_roots = []
+        self.deduplicator = Deduplicator()
+        self.rows_loaded = 0
+        self.load_roots(directories, 'load')
+
+    def add_directory(self, directory):
+        """
+        Dokłada katalog (karta, kopia z telefonu, archiwum) lub listę katalogów do bieżącej sesji.
+        Katalogi wczytywane razem skanuje jeden IngestWorker - różne dyski równolegle (MultiRootScanner).
+        """
+        directories = [directory] if isinstance(directory, str) else list(directory)
+        if not self.roots:
+            self.loadImages(directories)
+            return
+        directories = [d for d in dict.fromkeys(directories) if d not in self.roots and d not in self.pending_roots]
+        if not directories:
+            return
+        if self.ingest_thread is not None:
+            self.pending_roots.extend(directories)  # Wczytamy je razem po zakończeniu trwającego ładowania
+            return
+        self.roots.extend(directories)
+        self.load_roots(directories, 'add')
+
+    def load_roots(self, directories, mode):
+        worker = IngestWorker(directories, self.thumbnail_cache, self.max_workers, deduplicator=self.deduplicator)
+        self.start_ingest(worker, mode)
+        self.ingest_worker.progress.connect(self.loading_progress.emit)
+        self.ingest_worker.scanned.connect(self.start_watching)
+        self.openButton.setEnabled(False)
+        self.addButton.setEnabled(False)
+        self.loading_progress.emit(0)
+        self.ingest_thread.start()
+
+    def start_ingest(self, worker, mode):
+        """mode: 'load' - nowa sesja, 'add' - kolejny katalog, 'watch' - zmiany z obserwowania."""
+        self.ingest_mode = mode
+        self.ingest_thread = QThread(self)
+        self.ingest_worker = worker
+        self.ingest_worker.moveToThread(self.ingest_thread)
+
+        self.ingest_thread.started.connect(self.ingest_worker.run)
+        self.ingest_worker.rows_ready.connect(self.on_rows_ready)
+        self.ingest_worker.finished.connect(self.on_ingest_finished)
+        self.ingest_worker.finished.connect(self.ingest_thread.quit)
+        self.ingest_thread.finished.connect(self.ingest_worker.deleteLater)
+        self.ingest_thread.finished.connect(self.on_ingest_thread_finished)
+
+    def start_watching(self, snapshot, directories):
+        """Po pełnym skanie zaczyna obserwować katalog, startując od zapamiętanego stanu plików."""
+        if not self.watchCheckBox.isChecked():
+            return
+        if self.watcher is not None:
+            self.watcher.add_snapshot(snapshot, directories)  # Kolejny katalog tej samej sesji
+            return
+        self.watcher = DirectoryWatcher(snapshot, directories, IMAGE_EXTENSIONS + VIDEO_EXTENSIONS, self)
+        self.watcher.files_changed.connect(self.on_files_changed)
+        self.watcher.files_removed.connect(self.on_files_removed)
+
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher.deleteLater()
+            self.watcher = None
+        self.changed_paths = set()
+
+    def on_watch_toggled(self, checked):
+        # Po wyłączeniu obserwowanie można wznowić tylko ponownym wczytaniem katalogu
+        if not checked:
+            self.stop_watching()
+
+    def on_files_changed(self, paths):
+        """Wczytuje w tle nowe i zmienione pliki; gdy ładowanie trwa, czekają na jego koniec."""
+        self.changed_paths.update(paths)
+        if self.ingest_thread is None:
+            self.load_changed_files()
+
+    def load_changed_files(self):
+        paths, self.changed_paths = sorted(self.changed_paths), set()
+        self.watch_paths = set(paths)
+        worker = IngestWorker(None, self.thumbnail_cache, self.max_workers, paths=paths, deduplicator=self.deduplicator)
+        self.start_ingest(worker, 'watch')
+        self.ingest_thread.start()
+
+    def on_files_removed(self, paths):
+        self.changed_paths.difference_update(paths)
+        # Duplikaty usuniętego pliku przestają być duplikatami - wczytujemy je jako nowe pliki
+        for filepath in paths:
+            self.changed_paths.update(self.deduplicator.remove(filepath))
+        self.thumbnail_model.invalidate(paths)
+        self.files_removed.emit(paths)
+        if self.changed_paths and self.ingest_thread is None:
+            self.load_changed_files()
+
+    def on_rows_ready(self, df):
+        """
+        Przekazuje dalej porcję wierszy: pierwsza porcja sesji zastępuje dane (także gdy przyszła
+        z obserwowania katalogu, który przy otwarciu był pusty), kolejne są dokładane.
+        """
+        if self.ingest_mode == 'watch':
+            # Miniaturki zmienionych plików są już nowe w cache - usuwamy stare zdekodowane kopie
+            paths = list(df['Pełna ścieżka pliku'])
+            self.watch_paths.difference_update(paths)
+            self.thumbnail_model.invalidate(paths)
+            if self.preview_loader is not None:
+                self.preview_loader.invalidate(paths)
+        if self.rows_loaded == 0:
             self.files_loaded.emit(df)
+        elif self.ingest_mode in ('watch', 'add'):
+            self.files_updated.emit(df)  # Scalanie z wierszami sesji (nowa numeracja)
+        else:
+            self.files_appended.emit(df)
+        self.rows_loaded += len(df)
+
+    def on_ingest_finished(self, failed_files):
+        """Obsługuje zakończenie ładowania przez IngestWorker."""
+        if self.ingest_mode == 'watch':
+            # Wczytywanie zmian odbywa się w tle, bez okien dialogowych. Zmieniony plik, który nie dał
+            # wiersza (stał się nieczytelny lub kopią innego pliku sesji), usuwamy jak plik, który zniknął,
+            # aby w widokach nie został jego wiersz ze starymi metadanymi
+            stale, self.watch_paths = sorted(self.watch_paths), set()
+            if stale:
+                self.thumbnail_model.invalidate(stale)
+                self.files_removed.emit(stale)
+            return
+
+        # Emitowanie sygnału po zakończeniu ładowania plików
+        self.loading_progress.emit(100)
+
+        if self.rows_loaded == 0:
+            self.show_empty_df_message()  # Wywołaj okno dialogowe, jeśli nic nie wczytano
 
         # Jeśli są pliki, które się nie załadowały, wyświetl okno dialogowe
         if failed_files:
             self.show_failed_files_dialog(failed_files)
 
-    def is_valid_metadata(self, metadata):
+    def on_ingest_thread_finished(self):
+        self.ingest_thread.deleteLater()
+        self.ingest_thread = None
+        self.ingest_worker = None
+        self.ingest_mode = None
+        self.openButton.setEnabled(True)
+        self.addButton.setEnabled(bool(self.roots))
+        if self.deduplicator is not None:
+            self.changed_paths.update(self.deduplicator.take_orphans())
+
+        # Najpierw katalogi dodane w trakcie ładowania, potem zmiany zgłoszone przez obserwowanie
+        if self.pending_roots:
+            directories, self.pending_roots = self.pending_roots, []
+            self.add_directory(directories)
+        elif self.changed_paths and self.watcher is not None:
+            self.load_changed_files()
+
+    def stop_loading(self):
         """
-        Sprawdza, czy metadane są ważne.
-        Pliki z koordynatami 'Unknown' lub (0,0) są traktowane jako błędne.
+        Przerywa obserwowanie katalogu i trwające ładowanie, a potem czeka na zakończenie
+        wątku (np. przy zamykaniu okna lub wczytywaniu innego katalogu).
         """
-        # Sprawdzenie koordynatów
-        coords = metadata['Koordynaty']
-        if coords == 'Unknown':
-            return False
-
-        try:
-            lat, lon = map(float, coords.split(', '))
-            if lat == 0.0 and lon == 0.0:  # Sprawdzenie, czy współrzędne nie są (0,0)
-                return False
-        except ValueError:
-            return False  # Jeśli nie można przekonwertować na float, uznajemy metadane za błędne
-
-        # Sprawdzenie innych metadanych
-        if metadata['Data zrobienia zdjęcia'] == 'Unknown' or metadata['Rozdzielczość pliku'] == 'Unknown':
-            return False
-
-        return True
+        self.stop_watching()
+        self.pending_roots = []
+        if self.ingest_thread is not None:
+            self.ingest_worker.rows_ready.disconnect(self.on_rows_ready)
+            self.ingest_worker.finished.disconnect(self.on_ingest_finished)
+            self.ingest_thread.finished.disconnect(self.on_ingest_thread_finished)
+            self.ingest_worker.cancel()
+            self.ingest_thread.quit()
+            self.ingest_thread.wait()
+            self.on_ingest_thread_finished()
 
     def show_empty_df_message(self):
         """Wyświetla okno dialogowe, gdy DataFrame jest pusty."""
@@ -241,212 +338,150 @@ class ImageThumbnailViewer(QWidget):
 
         dialog.exec_()
 
-    def get_image_metadata(self, filepath):
-        try:
-            with Image.open(filepath) as img:
-                exif_data = img._getexif() or {}
-                exif = {TAGS.get(tag, tag): value for tag, value in exif_data.items()}
-
-                resolution = f"{img.width}x{img.height}"
-                coordinates = self.get_coordinates(exif)
-                date_time = exif.get('DateTime', 'Unknown').split()
-                date = date_time[0] if date_time else 'Unknown'
-                time = date_time[1] if len(date_time) > 1 else 'Unknown'
-
-                return {
-                    'Pełna ścieżka pliku': filepath,
-                    'Rozdzielczość pliku': resolution,
-                    'Koordynaty': coordinates,
-                    'Data zrobienia zdjęcia': date,
-                    'Godzina zrobienia zdjęcia': time
-                }
-        except Exception as e:
-            #print(f"Error processing image {filepath}: {e}")
-            return {
-                'Pełna ścieżka pliku': filepath,
-                'Rozdzielczość pliku': 'Unknown',
-                'Koordynaty': 'Unknown',
-                'Data zrobienia zdjęcia': 'Unknown',
-                'Godzina zrobienia zdjęcia': 'Unknown'
-            }
-
-    def get_coordinates(self, exif):
-        gps_info = exif.get('GPSInfo')
-        if not gps_info:
-            return 'Unknown'
-
-        def get_decimal_from_dms(dms, ref):
-            degrees, minutes, seconds = dms
-            decimal = degrees + (minutes / 60.0) + (seconds / 3600.0)
-            if ref in ['S', 'W']:
-                decimal = -decimal
-            return decimal
-
-        try:
-            lat = get_decimal_from_dms(gps_info[2], gps_info[1])
-            lon = get_decimal_from_dms(gps_info[4], gps_info[3])
-            return f"{lat}, {lon}"
-        except (IndexError, KeyError, ValueError):
-            return 'Unknown'
-
-
-
-    # Nowa wersja funkcji get_video_metadata
-    def get_ffprobe_path(self):
-        system = platform.system()
-        if system == "Linux":
-            return os.path.join("ffmpeg-binaries", "linux", "ffprobe")
-        elif system == "Darwin":  # macOS
-            return os.path.join("ffmpeg-binaries", "macos", "ffprobe")
-        elif system == "Windows":
-            return os.path.join("ffmpeg-binaries", "windows", "ffprobe.exe")
-        else:
-            raise Exception(f"Unsupported system: {system}")
-
-    def get_video_metadata(self, filepath):
-        ffprobe = self.get_ffprobe_path()
-        command = [
-            ffprobe, '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', filepath
-        ]
-
-        # Ukryj konsolę na Windows
-        if platform.system() == "Windows":
-            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, creationflags=subprocess.CREATE_NO_WINDOW)
-        else:
-            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-
-        metadata = json.loads(result.stdout)
-
-        # Reszta funkcji
-        video_stream = next((stream for stream in metadata['streams'] if stream['codec_type'] == 'video'), None)
-        resolution = f"{video_stream['width']}x{video_stream['height']}" if video_stream else "Unknown"
-
-        tags = metadata.get('format', {}).get('tags', {})
-        gps_latitude = tags.get('location-eng', 'Unknown').split('+')[1] if 'location-eng' in tags else 'Unknown'
-        gps_longitude = tags.get('location-eng', 'Unknown').split('+')[2].rstrip('/') if 'location-eng' in tags else 'Unknown'
-
-        creation_time = tags.get('creation_time', 'Unknown')
-        if creation_time != 'Unknown':
-            date_taken = creation_time.split('T')[0].replace('-', ':')
-            time_taken = creation_time.split('T')[1].split('.')[0]
-        else:
-            date_taken = 'Unknown'
-            time_taken = 'Unknown'
-
-        wynik = {
-            'Pełna ścieżka pliku': filepath,
-            'Rozdzielczość pliku': resolution,
-            'Koordynaty': f"{gps_latitude}, {gps_longitude}",
-            'Data zrobienia zdjęcia': date_taken,
-            'Godzina zrobienia zdjęcia': time_taken
-        }
-
-        return wynik
-
-    def create_video_thumbnail(self, video_path, thumbnail_path):
-        cap = cv2.VideoCapture(video_path)
-        if cap.isOpened():
-            ret, frame = cap.read()
-            if ret:
-                #print(f"Successfully read a frame from {video_path}")
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                pil_img = Image.fromarray(frame)
-                pil_img.thumbnail((100, 100))
-                pil_img.save(thumbnail_path)
-                #print(f"Thumbnail saved to {thumbnail_path}")
-        cap.release()
-
     def display_images(self, df):
-        #print("Displaying images...")
-        #print(df)
-        self.clearLayout(self.scrollLayout)
-        row, col = 0, 0
-        for index, row_data in df.iterrows():
-            filepath = row_data['Pełna ścieżka pliku']
-            cache_path = self.get_cache_path(filepath)
-            #print(f"Attempting to load thumbnail from {cache_path}")
-            try:
-                pixmap = QPixmap(cache_path)
-                #print(f"Pixmap null status: {pixmap.isNull()}")
-                if not pixmap.isNull():
-                    #print(f"Successfully loaded thumbnail from {cache_path}")
-                    thumbnail = pixmap.scaled(100, 100, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    label = ClickableLabel(filepath, self)
-                    label.setPixmap(thumbnail)
-                    label.clicked.connect(self.showImage)
-                    self.scrollLayout.addWidget(label, row, col)
-                    #print(f"Added thumbnail to layout at row {row}, col {col}")
-                    col += 1
-                    if col > 4:  # 5 miniaturek w jednym rzędzie
-                        col = 0
-                        row += 1
-                else:
-                    #print(f"Unable to load image: {filepath}")
-                    pass
-            except Exception as e:
-                #print(f"Error loading image {filepath}: {e}")
-                pass
+        self.thumbnail_model.set_files(df['Pełna ścieżka pliku'])
+        self.thumbnail_view.scrollToTop()
+
+    def update_images(self, removed_rows, inserted_rows, filepaths):
+        """Aktualizuje siatkę o zmienione wiersze bez przebudowywania pozostałych miniaturek."""
+        self.thumbnail_model.apply_changes(removed_rows, inserted_rows, filepaths)
+
+    def prefetch_images(self, df):
+        """Przygotowuje w pamięci miniaturki grupy, zanim zostanie wyświetlona."""
+        self.thumbnail_model.prefetch(list(df['Pełna ścieżka pliku']))
+
+    def on_thumbnail_clicked(self, index):
+        open_in_default_app(index.data(FilePathRole))
+
+    def get_preview_loader(self):
+        if self.preview_loader is None:
+            # Podglądy dekodujemy najwyżej do rozdzielczości ekranu
+            screen = QApplication.primaryScreen()
+            size = screen.availableGeometry().size() * screen.devicePixelRatio()
+            self.preview_loader = PreviewLoader(self.thumbnail_cache, size, self)
+        return self.preview_loader
+
+    def open_preview(self, row):
+        """Otwiera podgląd wybranej miniaturki; strzałki przechodzą po plikach bieżącej siatki."""
+        # Kopia listy - siatka może się zmienić w trakcie podglądu (wczytywanie, obserwowany katalog)
+        filepaths = list(self.thumbnail_model.filepaths)
+        dialog = ImageDialog(filepaths, row, self.get_preview_loader(), self)
+        dialog.exec_()
+        # Po zamknięciu zaznaczamy w siatce ostatnio oglądany plik (o ile nadal w niej jest)
+        current = self.thumbnail_model.rows.get(filepaths[dialog.current])
+        if current is not None:
+            self.thumbnail_view.setCurrentIndex(self.thumbnail_model.index(current))
 
     def showImage(self, filepath):
-        if filepath.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp')):
-            dialog = ImageDialog(filepath, self)
-        elif filepath.lower().endswith(('.mp4', '.avi', '.mov', '.mkv')):
+        if filepath.lower().endswith(IMAGE_EXTENSIONS):
+            dialog = ImageDialog([filepath], 0, self.get_preview_loader(), self)
+        elif filepath.lower().endswith(VIDEO_EXTENSIONS):
             dialog = VideoDialog(filepath, self)
         else:
             return  # Jeśli plik nie jest zdjęciem ani wideo, nie rób nic.
         dialog.exec_()
 
-    def clearLayout(self, layout):
-        while layout.count():
-            child = layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-
     def update_group(self, group):
         self.df.loc[self.df.index.isin(self.filtered_df.index), 'Grupa'] = group
         self.group_updated.emit(self.df)
 
     def clear(self):
-        self.clearLayout(self.scrollLayout)
+        self.stop_watching()
+        self.roots = []
+        self.deduplicator = None
+        self.addButton.setEnabled(False)
+        self.thumbnail_model.set_files([])
 
 
-class ClickableLabel(QLabel):
-    clicked = pyqtSignal(str)
-
-    def __init__(self, filepath, parent=None):
-        super().__init__(parent)
-        self.filepath = filepath
-
-    def mousePressEvent(self, event):
-        self.play_video()
-
-    def play_video(self):
-        system = platform.system()
-        if system == "Windows":
-            # Otwórz wideo w domyślnym odtwarzaczu na Windows
-            os.startfile(self.filepath)
-        elif system == "Darwin":  # macOS
-            # Otwórz wideo w domyślnym odtwarzaczu na macOS
-            subprocess.run(["open", self.filepath])
-        elif system == "Linux":
-            # Otwórz wideo w domyślnym odtwarzaczu na Linux
-            subprocess.run(["xdg-open", self.filepath])
-        else:
-            raise Exception(f"Unsupported system: {system}")
+def open_in_default_app(filepath):
+    """Otwiera plik (zdjęcie lub wideo) w domyślnej aplikacji systemu."""
+    system = platform.system()
+    if system == "Windows":
+        # Otwórz plik w domyślnej aplikacji na Windows
+        os.startfile(filepath)
+    elif system == "Darwin":  # macOS
+        # Otwórz plik w domyślnej aplikacji na macOS
+        subprocess.run(["open", filepath])
+    elif system == "Linux":
+        # Otwórz plik w domyślnej aplikacji na Linux
+        subprocess.run(["xdg-open", filepath])
+    else:
+        raise Exception(f"Unsupported system: {system}")
 
 
 class ImageDialog(QDialog):
-    def __init__(self, filepath, parent=None):
+    """
+    Podgląd zdjęcia w rozdzielczości ekranu. Dekodowanie odbywa się w tle (PreviewLoader),
+    a strzałki w lewo/prawo przechodzą do sąsiednich plików, przygotowanych wcześniej.
+    """
+
+    def __init__(self, filepaths, current, preview_loader, parent=None):
         super().__init__(parent)
-        self.setWindowTitle('Image Viewer')
+        self.filepaths = filepaths
+        self.current = current
+        self.preview_loader = preview_loader
+        self.pixmap = None
+
         self.setGeometry(100, 100, 600, 600)
         layout = QVBoxLayout(self)
-        pixmap = QPixmap(filepath)
-        label = QLabel(self)
-        label.setPixmap(pixmap.scaled(self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        layout.addWidget(label)
+        self.label = QLabel(self)
+        self.label.setAlignment(Qt.AlignCenter)
+        self.label.setMinimumSize(1, 1)  # Pozwala zmniejszać okno poniżej rozmiaru obrazu
+        layout.addWidget(self.label)
         self.setLayout(layout)
 
+        self.preview_loader.preview_ready.connect(self.on_preview_ready)
+        self.show_current()
+
+    def show_current(self):
+        filepath = self.filepaths[self.current]
+        self.setWindowTitle(f'Image Viewer - {os.path.basename(filepath)} ({self.current + 1}/{len(self.filepaths)})')
+        image = self.preview_loader.get(filepath)
+        if image is None:
+            # Do czasu zdekodowania oryginału pokazujemy największą miniaturkę z cache
+            image = self.preview_loader.cached_thumbnail(filepath)
+        if not image.isNull():
+            self.set_image(image)
+        else:
+            self.pixmap = None
+            self.label.setText('Loading...')
+        self.preview_loader.load_around(self.filepaths, self.current)
+
+    def on_preview_ready(self, filepath, image):
+        if filepath != self.filepaths[self.current]:
+            return
+        if image.isNull():
+            if self.pixmap is None:  # Miniaturka zastępcza zostaje, jeśli była
+                self.label.setText('Unable to load image')
+        else:
+            self.set_image(image)
+
+    def set_image(self, image):
+        self.pixmap = QPixmap.fromImage(image)
+        self.update_label()
+
+    def update_label(self):
+        if self.pixmap is not None:
+            self.label.setPixmap(self.pixmap.scaled(self.label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_label()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Right and self.current < len(self.filepaths) - 1:
+            self.current += 1
+            self.show_current()
+        elif event.key() == Qt.Key_Left and self.current > 0:
+            self.current -= 1
+            self.show_current()
+        else:
+            super().keyPressEvent(event)
+
+    def done(self, result):
+        self.preview_loader.preview_ready.disconnect(self.on_preview_ready)
+        super().done(result)
+
 
 def get_ffplay_path():
     system = platform.system()
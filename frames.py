@@ -0,0 +1,77 @@
+import pandas as pd
+
+
+# Grupa, do której trafiają wszystkie nowo wczytane pliki
+DEFAULT_GROUP = 'no category'
+
+
+def make_metadata(filepath, width, height, lat, lon, date_taken, time_taken):
+    """
+    Tworzy słownik metadanych pliku. Obok kolumn tekstowych (wyświetlanych jak dotychczas)
+    zawiera liczby lat, lon, width i height, aby nic nie musiało później parsować napisów.
+    Brakujące wartości liczbowe to None.
+    """
+    has_coordinates = lat is not None and lon is not None
+    has_resolution = bool(width) and bool(height)
+    return {
+        'Pełna ścieżka pliku': filepath,
+        'Rozdzielczość pliku': f"{width}x{height}" if has_resolution else 'Unknown',
+        'Koordynaty': f"{lat}, {lon}" if has_coordinates else 'Unknown',
+        'Data zrobienia zdjęcia': date_taken,
+        'Godzina zrobienia zdjęcia': time_taken,
+        'lat': float(lat) if has_coordinates else None,
+        'lon': float(lon) if has_coordinates else None,
+        'width': int(width) if has_resolution else None,
+        'height': int(height) if has_resolution else None,
+    }
+
+
+def add_typed_columns(df):
+    """
+    Ustawia typy kolumn wczytanych plików: float64 lat/lon, int64 width/height,
+    datetime64 taken_at (data i godzina zrobienia) oraz kategoryczną Grupę.
+    Napisy z datą są parsowane tylko tutaj - raz, wektorowo, dla całej porcji.
+    """
+    df['lat'] = df['lat'].astype('float64')
+    df['lon'] = df['lon'].astype('float64')
+    df['width'] = df['width'].fillna(0).astype('int64')
+    df['height'] = df['height'].fillna(0).astype('int64')
+
+    date = df['Data zrobienia zdjęcia']
+    taken_at = pd.to_datetime(date + ' ' + df['Godzina zrobienia zdjęcia'], format='%Y:%m:%d %H:%M:%S', errors='coerce')
+    # Pliki z datą, ale bez godziny - liczy się sam dzień
+    df['taken_at'] = taken_at.fillna(pd.to_datetime(date, format='%Y:%m:%d', errors='coerce'))
+
+    df['Grupa'] = pd.Categorical(df['Grupa'])
+    return df
+
+
+def concat_frames(frames):
+    """
+    Łączy ramki z zachowaniem kategorycznej Grupy - pd.concat zamienia ją na zwykłe napisy,
+    gdy kategorie ramek się różnią, dlatego najpierw ujednolicamy kategorie.
+    """
+    frames = [df for df in frames if df is not None]
+    categories = []
+    for df in frames:
+        categories.extend(group for group in df['Grupa'].cat.categories if group not in categories)
+    return pd.concat([df.assign(Grupa=df['Grupa'].cat.set_categories(categories)) for df in frames])
+
+
+def set_group(df, mask, group):
+    """Przypisuje grupę wierszom z maski (dodając ją do kategorii kolumny Grupa)."""
+    if group not in df['Grupa'].cat.categories:
+        df['Grupa'] = df['Grupa'].cat.add_categories([group])
+    df.loc[mask, 'Grupa'] = group
+
+
+def rename_group(df, old_group, new_group):
+    """Zmienia nazwę grupy - jedna zmiana kategorii zamiast nadpisywania wierszy."""
+    categories = df['Grupa'].cat.categories
+    if old_group not in categories:
+        return
+    if new_group in categories:
+        set_group(df, df['Grupa'] == old_group, new_group)
+        df['Grupa'] = df['Grupa'].cat.remove_categories([old_group])
+    else:
+        df['Grupa'] = df['Grupa'].cat.rename_categories({old_group: new_group})
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+class GroupIndex:
+    """
+    Przynależność wierszy self.df do grup, utrzymywana obok DataFrame, aby nie szukać
+    wierszy grupy porównaniem całej kolumny 'Grupa'. Pozycje to numery wierszy (iloc).
+    Przypisanie grupy i zmiana nazwy kosztują tyle, ile zmienionych wierszy; posortowana
+    tablica pozycji grupy jest tworzona dopiero przy odczycie i zapamiętywana do następnej zmiany.
+    Usunięcie wierszy przesuwa pozycje, więc wymaga przebudowy (rebuild).
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.group_of = []  # pozycja -> grupa
+        self.members = {}  # grupa -> zbiór pozycji (kolejność kluczy = kolejność pojawienia się grup)
+        self.arrays = {}  # grupa -> posortowana tablica pozycji
+
+    def rebuild(self, groups):
+        """Tworzy indeks od nowa z kolumny 'Grupa' (w kolejności wierszy)."""
+        self.clear()
+        self.append(groups)
+
+    def append(self, groups):
+        """Dokłada wiersze dopisane na końcu DataFrame."""
+        start = len(self.group_of)
+        self.group_of.extend(groups)
+        for position, group in enumerate(self.group_of[start:], start):
+            self.members.setdefault(group, set()).add(position)
+            self.arrays.pop(group, None)
+
+    def assign(self, positions, group):
+        """Przenosi wiersze o podanych pozycjach do grupy."""
+        target = self.members.setdefault(group, set())
+        for position in positions:
+            old_group = self.group_of[position]
+            if old_group == group:
+                continue
+            self.members[old_group].discard(position)
+            self.arrays.pop(old_group, None)
+            self.group_of[position] = group
+            target.add(position)
+        self.arrays.pop(group, None)
+
+    def rename(self, old_group, new_group):
+        if old_group not in self.members or old_group == new_group:
+            return
+        if new_group in self.members:
+            self.assign(list(self.members[old_group]), new_group)  # Połączenie z istniejącą grupą
+            del self.members[old_group]
+            self.arrays.pop(old_group, None)
+            return
+        # Nowa nazwa zajmuje miejsce starej w kolejności grup
+        self.members = {new_group if group == old_group else group: members
+                        for group, members in self.members.items()}
+        for position in self.members[new_group]:
+            self.group_of[position] = new_group
+        if old_group in self.arrays:
+            self.arrays[new_group] = self.arrays.pop(old_group)
+
+    def groups(self):
+        """Niepuste grupy w kolejności pojawienia się."""
+        return [group for group, members in self.members.items() if members]
+
+    def count(self, group):
+        return len(self.members.get(group, ()))
+
+    def positions(self, group):
+        """Posortowana tablica pozycji wierszy grupy."""
+        array = self.arrays.get(group)
+        if array is None:
+            array = np.fromiter(sorted(self.members.get(group, ())), dtype=np.intp)
+            self.arrays[group] = array
+        return array
+
+    def mask(self, group):
+        """Tablica True/False długości DataFrame - True dla wierszy grupy."""
+        mask = np.zeros(len(self.group_of), dtype=bool)
+        mask[self.positions(group)] = True
+        return mask
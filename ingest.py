@@ -0,0 +1,587 @@
+import os
+import io
+import time
+import platform
+import subprocess
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import pandas as pd
+from PIL import Image
+from PIL import ExifTags
+from PIL.ExifTags import TAGS
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from metadata_index import MetadataIndex
+from thumbnail_cache import get_cache_dir, THUMBNAIL_LEVELS
+from video_metadata import read_video_metadata_batch
+from scanner import MultiRootScanner, PathListScanner, BackgroundScan
+from video_thumbnails import create_poster_frames, set_decode_slots, MAX_POSTER_DECODES
+from frames import make_metadata, add_typed_columns, DEFAULT_GROUP
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+# Obraz, z którego powstają wszystkie poziomy miniaturek, mieści się w kwadracie największego poziomu
+THUMBNAIL_SIZE = (THUMBNAIL_LEVELS[-1], THUMBNAIL_LEVELS[-1])
+THUMBNAIL_QUALITY = 85
+
+# Tagi IFD1 wskazujące osadzony w EXIF podgląd JPEG
+JPEG_INTERCHANGE_FORMAT = 0x0201
+JPEG_INTERCHANGE_FORMAT_LENGTH = 0x0202
+
+METADATA_INDEX_NAME = 'metadata.db'
+
+# Liczba filmów wysyłanych razem do jednego procesu roboczego (jedno zapytanie do exiftool)
+VIDEO_BATCH_SIZE = 32
+
+# Wiersze trafiają do GUI porcjami: co ROWS_BATCH_SIZE plików lub co ROWS_BATCH_INTERVAL sekund
+ROWS_BATCH_SIZE = 500
+ROWS_BATCH_INTERVAL = 0.25
+
+# Minimalny odstęp (w sekundach) między kolejnymi sygnałami postępu
+PROGRESS_INTERVAL = 0.1
+# Najdłuższy czas (w sekundach), przez jaki koordynator czeka na skaner lub pulę,
+# zanim sprawdzi, czy trzeba wysłać porcję wierszy i postęp
+INGEST_POLL_INTERVAL = 0.05
+
+
+def is_valid_metadata(metadata):
+    """
+    Sprawdza, czy metadane są ważne.
+    Pliki z koordynatami 'Unknown' lub (0,0) są traktowane jako błędne.
+    """
+    # Sprawdzenie koordynatów
+    lat, lon = metadata['lat'], metadata['lon']
+    if lat is None or lon is None:
+        return False
+    if lat == 0.0 and lon == 0.0:  # Sprawdzenie, czy współrzędne nie są (0,0)
+        return False
+
+    # Sprawdzenie innych metadanych
+    if metadata['Data zrobienia zdjęcia'] == 'Unknown' or metadata['width'] is None:
+        return False
+
+    return True
+
+
+def unknown_metadata(filepath):
+    return make_metadata(filepath, None, None, None, None, 'Unknown', 'Unknown')
+
+
+def read_image_metadata(img, filepath):
+    """Odczytuje metadane z już otwartego obrazu PIL (bez ponownego otwierania pliku)."""
+    try:
+        exif_data = img._getexif() or {}
+    except Exception:
+        exif_data = {}  # Formaty bez EXIF (PNG, GIF, BMP)
+    exif = {TAGS.get(tag, tag): value for tag, value in exif_data.items()}
+
+    lat, lon = get_coordinates(exif)
+    date_time = exif.get('DateTime', 'Unknown').split()
+    date = date_time[0] if date_time else 'Unknown'
+    time = date_time[1] if len(date_time) > 1 else 'Unknown'
+
+    return make_metadata(filepath, img.width, img.height, lat, lon, date, time)
+
+
+def get_image_metadata(filepath):
+    try:
+        with Image.open(filepath) as img:
+            return read_image_metadata(img, filepath)
+    except Exception as e:
+        #print(f"Error processing image {filepath}: {e}")
+        return unknown_metadata(filepath)
+
+
+def get_coordinates(exif):
+    """Zwraca (szerokość, długość) geograficzną w stopniach albo (None, None)."""
+    gps_info = exif.get('GPSInfo')
+    if not gps_info:
+        return None, None
+
+    def get_decimal_from_dms(dms, ref):
+        degrees, minutes, seconds = dms
+        decimal = degrees + (minutes / 60.0) + (seconds / 3600.0)
+        if ref in ['S', 'W']:
+            decimal = -decimal
+        return decimal
+
+    try:
+        lat = get_decimal_from_dms(gps_info[2], gps_info[1])
+        lon = get_decimal_from_dms(gps_info[4], gps_info[3])
+        return float(lat), float(lon)
+    except (IndexError, KeyError, ValueError, TypeError, ZeroDivisionError):
+        return None, None
+
+
+def get_ffprobe_path():
+    system = platform.system()
+    if system == "Linux":
+        return os.path.join("ffmpeg-binaries", "linux", "ffprobe")
+    elif system == "Darwin":  # macOS
+        return os.path.join("ffmpeg-binaries", "macos", "ffprobe")
+    elif system == "Windows":
+        return os.path.join("ffmpeg-binaries", "windows", "ffprobe.exe")
+    else:
+        raise Exception(f"Unsupported system: {system}")
+
+
+def run_ffprobe(command):
+    # Ukryj konsolę na Windows
+    if platform.system() == "Windows":
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, creationflags=subprocess.CREATE_NO_WINDOW)
+    else:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return json.loads(result.stdout)
+
+
+def parse_video_tags(tags):
+    """Zamienia tagi kontenera (location-eng, creation_time) na szerokość, długość, datę i godzinę."""
+    try:
+        # Format ISO 6709, np. "+52.2297+021.0122/"
+        location = tags['location-eng'].split('+')
+        gps_latitude, gps_longitude = float(location[1]), float(location[2].rstrip('/'))
+    except (KeyError, IndexError, ValueError):
+        gps_latitude, gps_longitude = None, None
+
+    creation_time = tags.get('creation_time', 'Unknown')
+    if creation_time != 'Unknown':
+        date_taken = creation_time.split('T')[0].replace('-', ':')
+        time_taken = creation_time.split('T')[1].split('.')[0]
+    else:
+        date_taken = 'Unknown'
+        time_taken = 'Unknown'
+
+    return gps_latitude, gps_longitude, date_taken, time_taken
+
+
+def get_video_metadata(filepath):
+    ffprobe = get_ffprobe_path()
+    command = [
+        ffprobe, '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', filepath
+    ]
+    metadata = run_ffprobe(command)
+
+    video_stream = next((stream for stream in metadata['streams'] if stream['codec_type'] == 'video'), None) or {}
+
+    lat, lon, date_taken, time_taken = parse_video_tags(metadata.get('format', {}).get('tags', {}))
+
+    return make_metadata(filepath, video_stream.get('width'), video_stream.get('height'), lat, lon, date_taken, time_taken)
+
+
+def probe_video(filepath):
+    """
+    Jedno wywołanie ffprobe zwracające tagi kontenera oraz rozdzielczość
+    pierwszego strumienia wideo (bez analizy pozostałych strumieni).
+    """
+    command = [
+        get_ffprobe_path(), '-v', 'quiet', '-print_format', 'json', '-select_streams', 'v:0',
+        '-show_entries', 'stream=width,height:format_tags=location-eng,creation_time', filepath
+    ]
+    probe = run_ffprobe(command)
+    streams = probe.get('streams') or [{}]
+    return probe.get('format', {}).get('tags', {}), streams[0].get('width'), streams[0].get('height')
+
+
+def encode_thumbnails(pil_img, levels=THUMBNAIL_LEVELS):
+    """
+    Tworzy z jednego obrazu miniaturki podanych rozmiarów (domyślnie wszystkich THUMBNAIL_LEVELS)
+    i zwraca słownik poziom -> bajty JPEG. Każdy mniejszy poziom powstaje
+    z poprzedniego, więc oryginał jest dekodowany i skalowany tylko raz.
+    """
+    if pil_img.mode != 'RGB':
+        pil_img = pil_img.convert('RGB')  # JPEG nie obsługuje przezroczystości ani palety
+    encoded = {}
+    for level in sorted(levels, reverse=True):
+        pil_img.thumbnail((level, level))
+        buffer = io.BytesIO()
+        pil_img.save(buffer, format='JPEG', quality=THUMBNAIL_QUALITY)
+        encoded[level] = buffer.getvalue()
+    return encoded
+
+
+def get_embedded_thumbnail(img):
+    """
+    Zwraca podgląd osadzony w EXIF (IFD1) jako obraz PIL albo None.
+    Podglądy mniejsze od najmniejszej miniaturki lub o innych proporcjach niż oryginał
+    (część aparatów dokleja czarne pasy do podglądu 160x120) są odrzucane.
+    """
+    if img.format != 'JPEG' or 'exif' not in img.info:
+        return None
+
+    try:
+        ifd1 = img.getexif().get_ifd(ExifTags.IFD.IFD1)
+        offset = ifd1.get(JPEG_INTERCHANGE_FORMAT)
+        length = ifd1.get(JPEG_INTERCHANGE_FORMAT_LENGTH)
+        if not offset or not length:
+            return None
+
+        # Przesunięcie w IFD1 liczone jest od początku nagłówka TIFF, za prefiksem "Exif\0\0"
+        raw = img.info['exif']
+        if raw.startswith(b'Exif\x00\x00'):
+            raw = raw[6:]
+        preview = Image.open(io.BytesIO(raw[offset:offset + length]))
+        preview.load()
+    except Exception:
+        return None
+
+    if max(preview.size) < THUMBNAIL_LEVELS[0]:
+        return None
+    aspect = img.width / img.height
+    if abs(preview.width / preview.height - aspect) > 0.05 * aspect:
+        return None
+    return preview
+
+
+def create_image_thumbnails(img):
+    """
+    Tworzy miniaturki obrazu we wszystkich rozmiarach, unikając dekodowania wszystkich pikseli:
+    poziomy nie większe od podglądu z EXIF (zwykle ok. 160 px, czyli poziom 100) powstają z podglądu,
+    a pozostałe z trybu draft dekodera JPEG lub - gdy ten nie zadziała - z pełnego dekodowania.
+    """
+    levels = {}
+    pending = THUMBNAIL_LEVELS
+    preview = get_embedded_thumbnail(img)
+    if preview is not None:
+        covered = [level for level in THUMBNAIL_LEVELS if level <= max(preview.size)]
+        levels.update(encode_thumbnails(preview, covered))
+        pending = [level for level in THUMBNAIL_LEVELS if level not in covered]
+    if not pending:
+        return levels
+
+    # Tryb draft: dekoder JPEG skaluje w domenie DCT (1/2, 1/4, 1/8),
+    # więc od razu dostajemy obraz niewiele większy od największego brakującego poziomu.
+    # Rozmiar podajemy w proporcjach oryginału - draft wybiera skalę, przy której oba boki są nie mniejsze.
+    # Dla pozostałych formatów draft nic nie robi i obraz dekodowany jest w całości.
+    scale = min(1.0, max(pending) / max(img.size))
+    try:
+        img.draft('RGB', (max(1, int(img.width * scale)), max(1, int(img.height * scale))))
+    except Exception:
+        pass
+    levels.update(encode_thumbnails(img, pending))
+    return levels
+
+
+def extract_image(filepath, record, need_thumbnail):
+    # Plik otwieramy raz: ten sam obiekt PIL daje EXIF, rozdzielczość i miniaturkę
+    with open(filepath, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        record['size'], record['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+
+        with Image.open(f) as img:
+            try:
+                metadata = read_image_metadata(img, filepath)
+            except Exception as e:
+                record['error'] = f"{filepath}: Error loading image metadata - {e}"
+                return record
+
+            if need_thumbnail:
+                try:
+                    record['thumbnail'] = create_image_thumbnails(img)
+                except Exception as e:
+                    record['error'] = f"{filepath}: Error creating thumbnail - {e}"
+                    return record
+
+    record['metadata'] = metadata
+    return record
+
+
+def extract_video(filepath, record, poster=None, metadata=None):
+    """
+    poster - klatka filmu przygotowana przez create_poster_frames (None, gdy miniaturka jest już w cache).
+    metadata - metadane odczytane wcześniej przez sesję exiftool; gdy ich brak, używamy ffprobe.
+    """
+    stat = os.stat(filepath)
+    record['size'], record['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+
+    if poster is not None:
+        try:
+            record['thumbnail'] = encode_thumbnails(poster)
+        except Exception as e:
+            record['error'] = f"{filepath}: Error creating video thumbnail - {e}"
+            return record
+
+    if metadata is None or metadata['width'] is None:
+        # Kontener MP4/MOV przechowuje GPS i datę w tagach, rozdzielczość bierzemy z tego samego wywołania
+        try:
+            tags, width, height = probe_video(filepath)
+        except Exception as e:
+            record['error'] = f"{filepath}: Error loading video metadata - {e}"
+            return record
+
+        if metadata is None:
+            lat, lon, date_taken, time_taken = parse_video_tags(tags)
+        else:
+            lat, lon = metadata['lat'], metadata['lon']
+            date_taken, time_taken = metadata['Data zrobienia zdjęcia'], metadata['Godzina zrobienia zdjęcia']
+        metadata = make_metadata(filepath, width, height, lat, lon, date_taken, time_taken)
+
+    record['metadata'] = metadata
+    return record
+
+
+def extract_file(filepath, need_thumbnail=True, video_metadata=None, poster=None):
+    """
+    Jednoprzebiegowy ekstraktor uruchamiany w procesie roboczym (bez Qt).
+    Zwraca rekord z miniaturkami (słownik poziom -> bajty JPEG), metadanymi, rozmiarem i czasem
+    modyfikacji pliku oraz ewentualnym opisem błędu.
+    """
+    record = {'path': filepath, 'size': None, 'mtime_ns': None,
+              'thumbnail': None, 'metadata': None, 'error': None}
+    try:
+        if filepath.lower().endswith(IMAGE_EXTENSIONS):
+            extract_image(filepath, record, need_thumbnail)
+        elif filepath.lower().endswith(VIDEO_EXTENSIONS):
+            extract_video(filepath, record, poster, video_metadata)
+        else:
+            return record
+    except Exception as e:
+        record['error'] = f"{filepath}: Error processing file - {e}"
+        return record
+
+    # Sprawdzamy, czy są wymagane metadane (koordynaty, data i rozdzielczość)
+    if record['metadata'] is not None and not is_valid_metadata(record['metadata']):
+        record['metadata'] = None
+        record['error'] = f"{filepath}: Invalid metadata (Coordinates, Date, or Resolution missing or invalid)"
+    return record
+
+
+def extract_batch(tasks):
+    """
+    Przetwarza paczkę plików w jednym zadaniu puli. Metadane wszystkich filmów z paczki
+    pobierane są jednym zapytaniem do sesji exiftool działającej w tym procesie,
+    a klatki filmów dekodowane są równolegle.
+    tasks - lista krotek (ścieżka, czy potrzebna miniaturka).
+    """
+    video_paths = [path for path, need_thumbnail in tasks if path.lower().endswith(VIDEO_EXTENSIONS)]
+    video_metadata = read_video_metadata_batch(video_paths)
+    posters = create_poster_frames(
+        [path for path, need_thumbnail in tasks if need_thumbnail and path.lower().endswith(VIDEO_EXTENSIONS)],
+        THUMBNAIL_SIZE)
+    return [extract_file(path, need_thumbnail, video_metadata.get(path), posters.get(path))
+            for path, need_thumbnail in tasks]
+
+
+def build_dataframe(image_data, first_number=1):
+    """
+    Tworzy DataFrame z metadanych obrazów i wideo wraz z kolumnami roboczymi
+    i kolumnami o właściwych typach (patrz frames.add_typed_columns).
+    first_number - numer porządkowy pierwszego wiersza (kolejne porcje kontynuują numerację).
+    """
+    df = pd.DataFrame(image_data)
+
+    if not df.empty:
+        df.index += first_number  # Numerowanie od 1
+        df.insert(0, 'Liczba porządkowa', df.index)
+
+        # Dodanie kolumny Grupa i ustawienie wartości domyślnych
+        df['Grupa'] = DEFAULT_GROUP
+
+        # Dodanie kolumn map_mark i date_mark, domyślnie ustawionych na True
+        df['map_mark'] = True
+        df['date_mark'] = True
+
+        add_typed_columns(df)
+
+    return df
+
+
+class IngestWorker(QObject):
+    """
+    Koordynator ładowania katalogów. Obiekt jest przenoszony do osobnego QThread,
+    a właściwą pracę (dekodowanie miniaturek i metadanych) rozdziela na pulę procesów.
+    Zamiast katalogów można podać listę plików (paths) - tak wczytywane są pliki
+    nowe i zmienione, wykryte przez obserwowanie katalogu.
+    Opcjonalny deduplicator (duplicates.Deduplicator) pomija pliki o zawartości
+    identycznej z plikiem już wczytanym w sesji.
+    """
+    progress = pyqtSignal(int)
+    rows_ready = pyqtSignal(pd.DataFrame)  # kolejna porcja wczytanych plików
+    scanned = pyqtSignal(object, list)  # {ścieżka: (rozmiar, mtime_ns)} i lista katalogów po pełnym skanie
+    finished = pyqtSignal(list)  # lista plików, których nie udało się wczytać
+
+    def __init__(self, directories, thumbnail_cache, max_workers=None, paths=None, deduplicator=None):
+        super().__init__()
+        self.directories = [directories] if isinstance(directories, str) else directories
+        self.paths = paths
+        self.deduplicator = deduplicator
+        self.thumbnail_cache = thumbnail_cache
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._cancelled = False
+
+    def cancel(self):
+        """Przerywa ładowanie po zakończeniu plików, które są już w trakcie przetwarzania."""
+        self._cancelled = True
+
+    def report_progress(self, done):
+        # Postęp liczony względem bieżącego szacunku liczby plików; do końca skanowania
+        # nie pokazujemy 100%, bo szacunek może jeszcze wzrosnąć
+        total_files = max(self.scanner.estimated_total(), done, 1)
+        progress = int((done / total_files) * 100)
+        if not self.scanner.finished:
+            progress = min(progress, 99)
+
+        # Dławienie sygnałów postępu, aby nie zalewać pętli zdarzeń GUI
+        now = time.monotonic()
+        if progress != self.last_progress and now - self.last_emit >= PROGRESS_INTERVAL:
+            self.progress.emit(progress)
+            self.last_progress = progress
+            self.last_emit = now
+
+    def run(self):
+        index = MetadataIndex(os.path.join(get_cache_dir(), METADATA_INDEX_NAME))
+        try:
+            failed_files = self.ingest(index)
+        finally:
+            index.close()
+            self.thumbnail_cache.flush()
+        if self.paths is None and not self._cancelled:
+            # Stan katalogu po skanie - punkt wyjścia do wykrywania późniejszych zmian
+            self.scanned.emit(self.snapshot, self.scanner.directories)
+        self.finished.emit(failed_files)
+
+    def add_row(self, metadata):
+        """Dodaje wczytany plik do bieżącej porcji i wysyła ją, gdy jest dość duża lub dość stara."""
+        self.batch_rows.append(metadata)
+        if len(self.batch_rows) >= ROWS_BATCH_SIZE or time.monotonic() - self.last_batch >= ROWS_BATCH_INTERVAL:
+            self.flush_rows()
+
+    def flush_rows(self):
+        if self.batch_rows:
+            self.rows_ready.emit(build_dataframe(self.batch_rows, self.rows_emitted + 1))
+            self.rows_emitted += len(self.batch_rows)
+            self.batch_rows = []
+        self.last_batch = time.monotonic()
+
+    def ingest(self, index):
+        """
+        Pliki znalezione przez skaner trafiają od razu do indeksu metadanych, a te,
+        których trzeba nie ma w indeksie, do puli procesów - bez czekania na koniec skanowania.
+        Skaner działa w wątku w tle, a koordynator czeka na niego i na pulę najwyżej
+        INGEST_POLL_INTERVAL, więc gotowe wiersze i postęp nie stoją przy wolnym dysku.
+        """
+        if self.paths is not None:
+            self.scanner = PathListScanner(self.paths)
+        else:
+            self.scanner = MultiRootScanner(self.directories, IMAGE_EXTENSIONS + VIDEO_EXTENSIONS)
+        self.snapshot = {}
+        scan = BackgroundScan(self.scanner)
+        scanning = True
+
+        self.batch_rows = []  # Wiersze czekające na wysłanie do GUI
+        self.rows_emitted = 0
+        self.last_batch = time.monotonic()
+        self.last_progress = -1
+        self.last_emit = 0.0
+        failed_files = []  # Lista do przechowywania ścieżek plików, które nie zostały wczytane
+        done = 0
+
+        executor = None  # Pula startuje dopiero przy pierwszym pliku spoza indeksu
+        pending = {}
+        video_batch = []  # Filmy zbierane w paczki dla sesji exiftool
+        # Ograniczamy liczbę zadań w kolejce, żeby nie trzymać w pamięci 40k obiektów Future
+        max_in_flight = self.max_workers * 4
+
+        def submit(batch):
+            nonlocal executor
+            if executor is None:
+                # Proces potomny nie może dziedziczyć wątków Qt, więc zawsze używamy 'spawn'
+                context = multiprocessing.get_context('spawn')
+                # Wspólny semafor ogranicza łączną liczbę dekodowań klatek filmów we wszystkich procesach
+                executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                               initializer=set_decode_slots,
+                                               initargs=(context.BoundedSemaphore(MAX_POSTER_DECODES),))
+            future = executor.submit(extract_batch, [(task[0], task[2]) for task in batch])
+            pending[future] = batch
+
+        try:
+            while True:
+                found = []
+                if scanning and not self._cancelled and len(pending) < max_in_flight:
+                    # Gdy pula nic nie liczy, można poczekać na skaner; inaczej bierzemy tylko to, co już jest
+                    found = scan.take(max_in_flight - len(pending), 0 if pending else INGEST_POLL_INTERVAL)
+                    scanning = not scan.exhausted
+                for filepath, stat in found:
+                    if filepath in self.snapshot:
+                        continue  # Ten sam plik z dwóch nakładających się katalogów głównych
+                    self.snapshot[filepath] = (stat.st_size, stat.st_mtime_ns)
+
+                    # Ta sama zawartość pod inną ścieżką - w sesji zostaje tylko pierwszy plik
+                    if self.deduplicator is not None and self.deduplicator.check(filepath, stat.st_size):
+                        done += 1
+                        self.report_progress(done)
+                        continue
+
+                    # Niezmienione pliki z indeksu obsługujemy bez ich otwierania
+                    has_thumbnail = self.thumbnail_cache.contains(filepath)
+                    cached = index.lookup(filepath, stat.st_size, stat.st_mtime_ns)
+
+                    if cached is not None and (has_thumbnail or cached[0] is None):
+                        metadata, error = cached
+                        if metadata is not None:
+                            self.add_row(metadata)
+                        if error:
+                            failed_files.append(error)
+                        done += 1
+                        self.report_progress(done)
+                        continue
+
+                    # Plik znany z indeksu, ale zmieniony - jego miniaturka w cache jest nieaktualna
+                    need_thumbnail = not has_thumbnail or index.contains_path(filepath)
+
+                    # Obrazy trafiają do puli pojedynczo, filmy w paczkach
+                    task = (filepath, stat, need_thumbnail)
+                    if filepath.lower().endswith(VIDEO_EXTENSIONS):
+                        video_batch.append(task)
+                        if len(video_batch) >= VIDEO_BATCH_SIZE:
+                            submit(video_batch)
+                            video_batch = []
+                    else:
+                        submit([task])
+
+                # Niepełną paczkę filmów wysyłamy, gdy skaner skończył lub pula nie ma nic do roboty
+                if video_batch and not self._cancelled and (not scanning or not pending):
+                    submit(video_batch)
+                    video_batch = []
+
+                if not pending and (not scanning or self._cancelled):
+                    break
+
+                completed = ()
+                if pending:
+                    completed, _ = wait(pending, timeout=INGEST_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    batch = pending.pop(future)
+                    try:
+                        records = future.result()
+                    except Exception as e:
+                        for task in batch:
+                            failed_files.append(f"{task[0]}: Error processing file - {e}")
+                        done += len(batch)
+                        continue
+
+                    for (filepath, stat, need_thumbnail), record in zip(batch, records):
+                        # Miniaturki zapisuje tylko koordynator, procesy robocze nie dotykają cache
+                        if record['thumbnail'] is not None:
+                            self.thumbnail_cache.put_levels(filepath, record['thumbnail'])
+                        if record['metadata'] is not None:
+                            self.add_row(record['metadata'])
+                        if record['error']:
+                            failed_files.append(record['error'])
+                        index.store(filepath, stat.st_size, stat.st_mtime_ns, record['metadata'], record['error'])
+                    done += len(batch)
+
+                # Porcja wierszy wychodzi także wtedy, gdy nowe pliki przestały napływać
+                if time.monotonic() - self.last_batch >= ROWS_BATCH_INTERVAL:
+                    self.flush_rows()
+                self.report_progress(done)
+        finally:
+            scan.close()
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        self.flush_rows()
+        return failed_files
@@ -0,0 +1,487 @@
+import sys
+import datetime
+from PyQt5.QtWidgets import QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QProgressBar, QSizePolicy, QFileDialog, QMessageBox
+from timeline import TimelineWidget
+from maps import MapWidget
+from files import ImageThumbnailViewer
+from table import TableWidget
+import pandas as pd
+import numpy as np
+from save import save_images
+from thumbnail_cache import get_thumbnail_cache
+from duplicates import DuplicateFinder, DUPLICATES_GROUP, EXACT_DUPLICATE
+from frames import DEFAULT_GROUP, concat_frames, set_group, rename_group
+from spatial import SpatialIndex
+from groups import GroupIndex
+from refresh import ViewRefresher
+import os
+from PyQt5.QtWidgets import QMenuBar, QAction
+from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import QThread
+
+# Zmiana ustawień wyświetlania data frame
+pd.set_option('display.max_rows', None)  # Wyświetla wszystkie wiersze
+pd.set_option('display.max_columns', None)  # Wyświetla wszystkie kolumny
+pd.set_option('display.width', None)  # Ustawia szerokość wyświetlania do szerokości konsoli
+pd.set_option('display.max_colwidth', None)  # Wyświetla całą zawartość każdej kolumny
+
+class MainWindow(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("PixTidy")
+        self.setGeometry(100, 100, 1200, 800)
+        
+        def get_icon_path():
+            if hasattr(sys, '_MEIPASS'):
+                return os.path.join(sys._MEIPASS, 'icon.ico')
+            else:
+                return 'icon.ico'
+        
+        # Dodaj ikonkę
+        self.setWindowIcon(QIcon(get_icon_path()))
+
+
+
+        # Dodaj pasek menu
+        self.menu_bar = QMenuBar(self)
+        self.setMenuBar(self.menu_bar)
+
+        # Dodaj menu Help
+        help_menu = self.menu_bar.addMenu("Help")
+
+        # Dodaj opcję About w menu Help
+        # Opcja About
+        about_action = QAction("About", self)
+        about_action.triggered.connect(self.show_about_dialog)
+        help_menu.addAction(about_action)
+        # Opcja Getting Started Video
+        video_tutorial_action = QAction("Getting Started Video", self)
+        video_tutorial_action.triggered.connect(self.open_video_tutorial)
+        help_menu.addAction(video_tutorial_action)
+
+        # Główny widget
+        self.central_widget = QWidget()
+        self.setCentralWidget(self.central_widget)
+
+        # Layout dla central_widget
+        main_layout = QHBoxLayout()
+        self.central_widget.setLayout(main_layout)
+
+        # Layout dla lewej kolumny
+        left_layout = QVBoxLayout()
+        main_layout.addLayout(left_layout, 1)
+
+        # Layout dla prawej kolumny
+        right_layout = QVBoxLayout()
+        main_layout.addLayout(right_layout, 1)
+
+        # Dodanie widgetów do lewej kolumny
+        self.image_viewer = ImageThumbnailViewer(self)
+        self.table_widget = TableWidget(self)
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setVisible(False)
+        left_layout.addWidget(self.progress_bar)
+        left_layout.addWidget(self.image_viewer, 1)
+        left_layout.addWidget(self.table_widget, 1)
+
+        # Dodanie widgetów do prawej kolumny
+        self.timeline_widget = TimelineWidget(self)
+        self.map_widget = MapWidget(self.timeline_widget)
+
+        # Ustawienia dla map_widget
+        self.map_widget.setMinimumSize(300, 200)
+        self.map_widget.setMaximumSize(600, 800)
+        self.map_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+        # Ustawienia dla timeline_widget
+        self.timeline_widget.setMinimumSize(300, 200)
+        self.timeline_widget.setMaximumSize(600, 200)
+        self.timeline_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+        right_layout.addWidget(self.map_widget, 1)
+        right_layout.addWidget(self.timeline_widget, 1)
+
+        # Inicjalizacja zmiennych
+        self.current_group = "no category"
+        self.duplicates_thread = None
+        self.duplicates_finder = None
+        self.spatial_index = SpatialIndex()  # współrzędne plików według grup (zapytania z mapy)
+        self.group_index = GroupIndex()  # pozycje wierszy self.df według grup
+        self.row_position = np.empty(0, dtype=np.intp)  # 'Liczba porządkowa' -> pozycja wiersza w self.df (-1: brak)
+        self.table_widget.set_group_index(self.group_index)
+        self.refresher = ViewRefresher(self.image_viewer, self.timeline_widget, self.table_widget, self.map_widget)
+
+        # Połączenie sygnałów
+        self.image_viewer.files_loaded.connect(self.new_files_loaded)
+        self.image_viewer.files_appended.connect(self.append_files)
+        self.image_viewer.files_updated.connect(self.update_files)
+        self.image_viewer.files_removed.connect(self.remove_files)
+        self.image_viewer.loading_progress.connect(self.update_progress)
+        self.table_widget.active_group_changed.connect(self.change_activ_group)
+        self.table_widget.group_hovered.connect(self.prefetch_group)
+        self.table_widget.group_updated.connect(self.update_group)
+        self.map_widget.rectangle_selected.connect(self.filter_by_area)
+        self.timeline_widget.date_range_changed.connect(self.filter_by_date_range)
+        self.table_widget.duplicates_button.clicked.connect(self.find_duplicates)
+        self.table_widget.save_button.clicked.disconnect()
+        self.table_widget.save_button.clicked.connect(self.save_all)
+        self.table_widget.group_name_changed.connect(self.update_group_in_df)
+
+    def show_about_dialog(self):
+        """Wyświetla okno dialogowe z informacjami o aplikacji."""
+        QMessageBox.about(self, "About PixTidy",
+                          "PixTidy\n"
+                          "Version 1.0.3.0\n"
+                          "Created by: Damian Urbański\n"
+                          "Email: urbanski.automatyka@gmail.com")
+        
+    def open_video_tutorial(self):
+        """ Otwiera okno w domyślenj przeglądarce z filmem Youtube"""
+        import webbrowser
+        video_url = "https://www.youtube.com/watch?v=v8xnxqdqMMI"
+        webbrowser.open(video_url)
+
+
+    def new_files_loaded(self, df):
+        self.current_group = "no category"
+        self.spatial_index.clear()
+        self.index_rows(df)
+        self.group_index.rebuild(df['Grupa'].tolist())
+        self.index_positions(df)
+        self.refresher.reset()
+        self.map_widget.marker_manager.clear_markers()  # Numery porządkowe nowej sesji zaczynają się od 1
+        self.refresh_display(df, scale_view=True)
+
+    def append_files(self, df):
+        """
+        Dokłada kolejną porcję wczytywanych plików do self.df i aktualizuje widoki
+        przyrostowo, aby można było pracować z plikami, zanim wczyta się cały katalog.
+        """
+        # Nowe wiersze aktywnej grupy muszą respektować prostokąt zaznaczony już na mapie;
+        # filtr obszaru dotyczy tylko tej grupy (jak w filter_by_area), więc pozostałe go nie dostają
+        rectangle = self.map_widget.rectangle_manager.rectangle
+        if rectangle is not None:
+            in_group = (df['Grupa'] == self.current_group).to_numpy()
+            df['map_mark'] = np.where(in_group, self.rows_within_bounds(df, *rectangle), df['map_mark'].to_numpy())
+
+        self.df = concat_frames([self.df, df])
+        self.index_rows(df)
+        self.group_index.append(df['Grupa'].tolist())
+        self.index_positions(self.df)
+        # Do siatki i na mapę trafiają tylko nowe pliki, istniejące zostają na miejscu
+        self.refresh_display(self.df)
+
+    def update_files(self, df):
+        """
+        Scala pliki wczytane po zmianie w obserwowanym katalogu: nowe są dokładane na końcu,
+        a zmienione dostają nowe metadane z zachowaniem grupy oraz znaczników map_mark i date_mark.
+        """
+        if getattr(self, 'df', None) is None:
+            return
+        paths = self.df['Pełna ścieżka pliku']
+        existing = df['Pełna ścieżka pliku'].isin(paths)
+
+        changed = df[existing]
+        if len(changed):
+            columns = ['Rozdzielczość pliku', 'Koordynaty', 'Data zrobienia zdjęcia', 'Godzina zrobienia zdjęcia',
+                       'lat', 'lon', 'width', 'height', 'taken_at']
+            updates = changed.drop_duplicates('Pełna ścieżka pliku', keep='last').set_index('Pełna ścieżka pliku')
+            mask = paths.isin(updates.index)
+            for column in columns:  # Kolumna po kolumnie, aby zachować ich typy
+                self.df.loc[mask, column] = updates.loc[paths[mask], column].to_numpy()
+            self.index_rows(self.df[mask])  # Współrzędne mogły się zmienić
+            self.timeline_widget.invalidate()  # Daty mogły się zmienić
+            self.refresh_display(self.df)
+
+        added = df[~existing].copy()
+        if len(added):
+            first = int(self.df['Liczba porządkowa'].max()) + 1 if len(self.df) else 1
+            added['Liczba porządkowa'] = range(first, first + len(added))
+            self.append_files(added)
+
+    def remove_files(self, paths):
+        """Usuwa z self.df pliki, które zniknęły z obserwowanego katalogu."""
+        if getattr(self, 'df', None) is None:
+            return
+        removed = self.df['Pełna ścieżka pliku'].isin(paths)
+        if not removed.any():
+            return
+        self.spatial_index.remove(self.df.loc[removed, 'Liczba porządkowa'].tolist())
+        self.df = self.df[~removed]
+        self.group_index.rebuild(self.df['Grupa'].tolist())  # Pozycje wierszy się przesunęły
+        self.index_positions(self.df)
+        self.refresh_display(self.df)
+
+    def change_activ_group(self, group):
+        #print(f'change_activ_group funcion - now group is: {group}')
+        """ Funkcja przyjmuje za argument grupę, przy której zostało
+        kliknięte show w table widget i ustawia aktualną aktywnę grupę
+        w klasie MainWindow"""
+        self.current_group = group
+        self.update_group(group)  # Zdejmuje filtry i odświeża widoki dla nowej grupy
+
+    def prefetch_group(self, group):
+        """Wczytuje z wyprzedzeniem miniaturki grupy, nad którą użytkownik najechał w tabeli."""
+        if getattr(self, 'df', None) is None or group == self.current_group:
+            return
+        self.image_viewer.prefetch_images(self.group_rows(group, map_mark=True))
+
+    def update_group_in_df(self, old_group, new_group):
+        """ Funkcja aktualizuje nazwę grupy w self.df oraz odświeża widok """
+        #print(f"Updating group name in df from {old_group} to {new_group}")
+
+        # Zaktualizuj wiersze w self.df, gdzie nazwa grupy to old_group
+        rename_group(self.df, old_group, new_group)
+        self.group_index.rename(old_group, new_group)
+        self.spatial_index.rename_group(old_group, new_group)
+        self.refresher.rename_group(old_group, new_group)  # Wiersze się nie zmieniły - widoki zostają
+
+        # Jeżeli zmieniła się nazwa aktywnej grupy to zmień aktywną grupę.
+        if old_group == self.current_group:
+            self.current_group = new_group
+
+    def refresh_display(self, df, scale_view=False):
+        #print('refresh_display function')
+        self.df = df
+        self.table_widget.set_df(self.df)  # Ustawienie ramki danych w TableWidget
+
+        # Miniaturki, pinezki, dni na osi czasu i liczności grup - widoki dostają tylko zmiany
+        # względem poprzedniego odświeżenia (po zmianie aktywnej grupy odświeżają się w całości)
+        self.refresher.refresh(self.df, self.current_group, self.group_index, scale_view)
+
+
+    def filter_by_date_range(self, selected_dates):
+        """
+        Funkcja aktualizuje kolumnę 'date_mark' w self.df na podstawie przekazanej listy dat,
+        tylko dla aktywnej grupy. Maska liczona jest wektorowo na tablicach NumPy.
+        """
+        #print('filter_by_date_range function')
+
+        # Maska aktywnej grupy i obecna kolumna 'date_mark'
+        mask = self.group_index.mask(self.current_group)
+        old_date_mark = self.df['date_mark'].to_numpy()
+
+        if selected_dates:
+            # Dzień zrobienia zdjęcia jako datetime64[D] porównany ze zbiorem zaznaczonych dni (NaT daje False).
+            # Porównujemy numery dni - isin z tablicą przeglądową nie musi sortować całej kolumny
+            days = self.df['taken_at'].to_numpy().astype('datetime64[D]').view('int64')
+            selected = np.array(list(set(selected_dates)), dtype='datetime64[D]').view('int64')
+            date_mark = np.where(mask, np.isin(days, selected, kind='table'), old_date_mark)
+        else:
+            # Jeśli lista jest pusta, ustaw wszystkie daty na False (odznacz wszystko)
+            date_mark = old_date_mark & ~mask
+
+        # Sprawdzenie, czy coś się zmieniło w 'date_mark'
+        if not np.array_equal(date_mark, old_date_mark):
+            self.df['date_mark'] = date_mark
+            # Wywołanie refresh_display tylko, jeśli zaszły zmiany
+            self.refresh_display(self.df)
+
+
+
+    def filter_by_area(self, lat1, lon1, lat2, lon2):
+        #print(f'filter_by_area function - coordinates: {(lat1, lon1, lat2, lon2)}')
+
+        # Pozycje wierszy aktywnej grupy i obecna kolumna 'map_mark'
+        positions = self.group_index.positions(self.current_group)
+        old_map_mark = self.df['map_mark'].to_numpy()
+        map_mark = old_map_mark.copy()
+
+        # Sprawdzenie, czy współrzędne są zerowe, co oznacza usunięcie zaznaczenia obszaru
+        if lat1 == 0.0 and lon1 == 0.0 and lat2 == 0.0 and lon2 == 0.0:
+            # Ustaw wartość 'map_mark' na True dla wszystkich wierszy grupy
+            map_mark[positions] = True
+        else:
+            # Indeks przestrzenny zwraca numery porządkowe plików aktywnej grupy w prostokącie,
+            # a tablica row_position zamienia je na pozycje wierszy bez przeglądania całej kolumny
+            inside = self.spatial_index.query_bbox(lat1, lon1, lat2, lon2, self.current_group)
+            map_mark[positions] = False
+            map_mark[self.row_position[inside]] = True
+
+        # Sprawdzenie, czy coś się zmieniło w 'map_mark'
+        if not np.array_equal(map_mark, old_map_mark):
+            self.df['map_mark'] = map_mark
+            # Wywołanie refresh_display tylko, jeśli zaszły zmiany
+            self.refresh_display(self.df)
+
+
+    def rows_within_bounds(self, df, lat1, lon1, lat2, lon2):
+        """Zwraca tablicę True/False mówiącą, czy współrzędne wiersza leżą w prostokącie."""
+        # Brakujące współrzędne (NaN) nie spełniają żadnego porównania, więc dają False
+        lat = df['lat'].to_numpy()
+        lon = df['lon'].to_numpy()
+        return (lat >= lat1) & (lat <= lat2) & (lon >= lon1) & (lon <= lon2)
+
+    def group_rows(self, group, map_mark=False):
+        """Wiersze grupy z date_mark == True (i opcjonalnie map_mark == True), wybrane z indeksu grup."""
+        positions = self.group_index.positions(group)
+        keep = self.df['date_mark'].to_numpy()[positions]
+        if map_mark:
+            keep &= self.df['map_mark'].to_numpy()[positions]
+        return self.df.iloc[positions[keep]]
+
+    def assign_group(self, positions, group):
+        """Przenosi wiersze o podanych pozycjach do grupy - w self.df i w obu indeksach."""
+        mask = np.zeros(len(self.df), dtype=bool)
+        mask[positions] = True
+        set_group(self.df, mask, group)
+        self.group_index.assign(positions, group)
+        self.spatial_index.move(self.df['Liczba porządkowa'].to_numpy()[positions].tolist(), group)
+
+    def index_positions(self, df):
+        """Odtwarza tablicę row_position po zmianie wierszy self.df (wczytanie, dołożenie, usunięcie)."""
+        numbers = df['Liczba porządkowa'].to_numpy()
+        self.row_position = np.full(int(numbers.max()) + 1 if len(numbers) else 0, -1, dtype=np.intp)
+        self.row_position[numbers] = np.arange(len(numbers))
+
+    def index_rows(self, df):
+        """Dodaje (lub aktualizuje) wiersze w indeksie przestrzennym."""
+        self.spatial_index.add(df['Liczba porządkowa'].tolist(), df['lat'].to_numpy(), df['lon'].to_numpy(),
+                               df['Grupa'].tolist())
+
+    def update_group(self, group):
+        #print('update_group function')
+
+        # Wiersze, które należą do aktywnej grupy i mają 'date_mark' oraz 'map_mark' ustawione na True
+        positions = self.group_index.positions(self.current_group)
+        positions = positions[self.df['date_mark'].to_numpy()[positions] & self.df['map_mark'].to_numpy()[positions]]
+
+        # Zmieniamy grupę na przekazaną w argumencie dla przefiltrowanych wierszy
+        self.assign_group(positions, group)
+
+        # Ustawienie wartości True dla kolumn 'map_mark' i 'date_mark' w całym DataFrame
+        self.df['map_mark'] = True
+        self.df['date_mark'] = True
+
+        # wyczyszczenie zaznaczonego na mapie obszaru
+        self.map_widget.clear_selection()
+
+        # Wywołanie refresh_display, aby zaktualizować widok (miniaturki, pinezki i liczności grup)
+        self.refresh_display(self.df, scale_view=True)
+
+    def find_duplicates(self):
+        """Uruchamia w tle wyszukiwanie identycznych i prawie identycznych zdjęć."""
+        if getattr(self, 'df', None) is None or not len(self.df) or self.duplicates_thread is not None:
+            return
+        self.duplicates_thread = QThread(self)
+        self.duplicates_finder = DuplicateFinder(self.df, get_thumbnail_cache())
+        self.duplicates_finder.moveToThread(self.duplicates_thread)
+
+        self.duplicates_thread.started.connect(self.duplicates_finder.run)
+        self.duplicates_finder.progress.connect(self.update_progress)
+        self.duplicates_finder.finished.connect(self.on_duplicates_found)
+        self.duplicates_finder.finished.connect(self.duplicates_thread.quit)
+        self.duplicates_thread.finished.connect(self.on_duplicates_thread_finished)
+
+        self.table_widget.duplicates_button.setEnabled(False)
+        self.update_progress(0)
+        self.duplicates_thread.start()
+
+    def on_duplicates_thread_finished(self):
+        self.duplicates_finder.deleteLater()
+        self.duplicates_thread.deleteLater()
+        self.duplicates_finder = None
+        self.duplicates_thread = None
+        self.table_widget.duplicates_button.setEnabled(True)
+        self.update_progress(100)
+
+    def stop_duplicates(self):
+        if self.duplicates_thread is not None:
+            self.duplicates_finder.finished.disconnect(self.on_duplicates_found)
+            self.duplicates_finder.cancel()
+            self.duplicates_thread.quit()
+            self.duplicates_thread.wait()
+
+    def on_duplicates_found(self, result):
+        """
+        Zapisuje wynik w kolumnach dup_group, dup_keep i dup_kind, a nadmiarowe kopie z grupy domyślnej
+        przenosi do grupy 'duplicates', skąd można je przejrzeć lub pominąć przy zapisie.
+        Kopie w grupach ułożonych przez użytkownika są tylko oznaczone (dup_keep == False).
+        Kolumna dup_moved pamięta pliki przeniesione przez wyszukiwanie - przy kolejnym
+        wyszukiwaniu wracają one do grupy domyślnej, zanim zostaną przydzielone od nowa.
+        """
+        if getattr(self, 'df', None) is None:
+            return
+        if 'dup_moved' in self.df.columns:
+            # Pliki dołożone po poprzednim wyszukiwaniu mają NaN, więc porównujemy z True
+            moved = self.df['dup_moved'].eq(True).to_numpy() & (self.df['Grupa'] == DUPLICATES_GROUP).to_numpy()
+            self.assign_group(np.flatnonzero(moved), DEFAULT_GROUP)
+
+        result = result.set_index('Pełna ścieżka pliku')
+        paths = self.df['Pełna ścieżka pliku']
+        self.df['dup_group'] = paths.map(result['dup_group']).fillna(-1).astype(int)
+        self.df['dup_keep'] = paths.map(result['dup_keep']).fillna(True).astype(bool)
+        self.df['dup_kind'] = paths.map(result['dup_kind']).fillna('')
+
+        redundant = ~self.df['dup_keep'].to_numpy()
+        exact = int((self.df['dup_kind'] == EXACT_DUPLICATE).sum())
+        movable = redundant & (self.df['Grupa'] == DEFAULT_GROUP).to_numpy()
+        self.assign_group(np.flatnonzero(movable), DUPLICATES_GROUP)
+        self.df['dup_moved'] = movable
+        self.refresh_display(self.df)
+        QMessageBox.information(self, "Duplicates",
+                                f"Found {exact} identical copies and {int(redundant.sum()) - exact} similar photos in "
+                                f"{self.df.loc[self.df['dup_group'] >= 0, 'dup_group'].nunique()} groups; "
+                                f"{int(movable.sum())} moved to '{DUPLICATES_GROUP}'.")
+
+    def update_progress(self, progress):
+        """Funkcja wyświetla pasek postępu ładowania zdjęć"""
+        #print(f'update_progress funcion. Progres: {progress}')
+        self.progress_bar.setVisible(progress < 100)
+        self.progress_bar.setValue(progress)
+
+    def closeEvent(self, event):
+        """Zatrzymuje ładowanie plików w tle przed zamknięciem okna."""
+        self.image_viewer.stop_loading()
+        self.stop_duplicates()
+        get_thumbnail_cache().flush()
+        super().closeEvent(event)
+
+    def save_all(self):
+        #print('save_all funcion funcion')
+        if not hasattr(self, 'df') or self.df is None:
+            QMessageBox.critical(self, "Error", "No data available to save!")
+            return
+
+        options = QFileDialog.Options()
+        save_dir = QFileDialog.getExistingDirectory(self, "Select Directory", options=options)
+        if save_dir:
+            try:
+                success = save_images(self.df, save_dir)
+                if success:
+                    QMessageBox.information(self, "Success", "Files saved successfully!")
+                    self.clear_state()  # Resetowanie stanu aplikacji po zapisaniu plików
+                else:
+                    #print('Zapis anulowany, nie czyścimy stanu aplikacji')
+                    pass
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"An error occurred: {e}")
+
+    def clear_state(self):
+        #print('clear_state funcion')
+        self.stop_duplicates()
+        # Czyszczenie DataFrame i filtrowanego DataFrame
+        self.df = None
+        self.spatial_index.clear()
+        self.group_index.clear()
+        self.row_position = np.empty(0, dtype=np.intp)
+        self.refresher.reset()
+        self.current_group = None
+
+        # Czyszczenie widżetów
+        self.image_viewer.clear()
+        self.table_widget.clear()
+        self.map_widget.clear_selection()
+        self.timeline_widget.clear()
+        self.map_widget.marker_manager.clear_markers()  # Czyszczenie pinezek na mapie
+
+        # Czyszczenie paska postępu
+        self.progress_bar.reset()
+        self.progress_bar.setVisible(False)
+
+        # Cache miniaturek zostaje między sesjami - zapisujemy tylko kolejność LRU
+        get_thumbnail_cache().flush()
+
+        # Sprawdzenie czy wszystko zostało wyczyszczoe
+        #print(self.df)
+        #print(self.current_group)
@@ -2,47 +2,80 @@ from PyQt5.QtWidgets import QWidget, QVBoxLayout
 from PyQt5.QtWebEngineWidgets import QWebEngineView
 from PyQt5.QtWebChannel import QWebChannel
 from PyQt5.QtCore import pyqtSignal, QObject, pyqtSlot
+import json
+import numpy as np
+
+
+# Liczba miejsc po przecinku współrzędnych wysyłanych do strony (ok. 1 m) - krótszy JSON
+MARKER_DECIMALS = 5
 
 
 class MarkerManager(QObject):
-    def __init__(self, view):
+    """
+    Pinezki na mapie. Każda ma klucz ('Liczba porządkowa' pliku), więc przy zmianie
+    filtrów do strony trafiają tylko pinezki dodane i usunięte, a nie wszystkie od nowa.
+    Zmiany idą jednym sygnałem markers_changed przez QWebChannel - jako zwarty JSON
+    z kolumnami id, lat i lon (zamiast skryptu JavaScript z osobnym poleceniem na pinezkę).
+    """
+    markers_changed = pyqtSignal(str)
+
+    def __init__(self):
         super().__init__()
-        self.view = view
+        # Pinezki aktualnie na mapie: numery porządkowe i współrzędne
+        self.ids = np.empty(0, dtype=np.int64)
+        self.lats = np.empty(0)
+        self.lons = np.empty(0)
 
-    @pyqtSlot(list)
-    def add_markers(self, coordinates):
-        script = """
-        if (typeof markers === 'undefined') {
-            markers = [];
-        } else {
-            markers.forEach(marker => map.removeLayer(marker));
-            markers = [];
-        }
-        var bounds = [];
+    def set_markers(self, ids, lats, lons, scale_view=False):
         """
-        for lat, lon in coordinates:
-            script += f"""
-            var marker = L.marker([{lat}, {lon}]).addTo(map);
-            markers.push(marker);
-            bounds.push([{lat}, {lon}]);
-            """
-        script += """
-        if (bounds.length > 0) {
-            var boundsGroup = L.featureGroup(markers);
-            map.fitBounds(boundsGroup.getBounds());
-        }
+        Ustawia pinezki na mapie, wysyłając do strony tylko różnicę względem obecnych.
+        Pinezka pliku, którego współrzędne się zmieniły, jest usuwana i dodawana ponownie.
         """
-        self.view.page().runJavaScript(script)
+        # Obecna pinezka zostaje, jeśli jej id jest wśród nowych z tymi samymi współrzędnymi
+        kept = np.zeros(len(self.ids), dtype=bool)
+        if len(ids):
+            order = np.argsort(ids, kind='stable')
+            match = order[np.minimum(np.searchsorted(ids[order], self.ids), len(ids) - 1)]
+            kept = (ids[match] == self.ids) & (lats[match] == self.lats) & (lons[match] == self.lons)
+        removed = self.ids[~kept]
+        added = ~np.isin(ids, self.ids[kept])
+        self.ids, self.lats, self.lons = ids, lats, lons
+        if not len(removed) and not added.any() and not scale_view:
+            return
+        self.send(removed, ids[added], lats[added], lons[added], scale_view)
+
+    def send(self, removed, ids, lats, lons, scale_view, reset=False):
+        # Granice wszystkich pinezek liczymy tutaj - strona dodaje pinezki porcjami (chunkedLoading)
+        fit = None
+        if scale_view and len(self.ids):
+            fit = [[float(self.lats.min()), float(self.lons.min())], [float(self.lats.max()), float(self.lons.max())]]
+        self.markers_changed.emit(json.dumps({
+            'reset': reset,
+            'removed': removed.tolist(),
+            'ids': ids.tolist(),
+            'lats': np.round(lats, MARKER_DECIMALS).tolist(),
+            'lons': np.round(lons, MARKER_DECIMALS).tolist(),
+            'fit': fit,
+        }, separators=(',', ':')))
+
+    @pyqtSlot()
+    def request_markers(self):
+        """Strona po (ponownym) połączeniu z QWebChannel prosi o wszystkie pinezki."""
+        self.send(np.empty(0, dtype=np.int64), self.ids, self.lats, self.lons, True, reset=True)
+
+    @pyqtSlot(list)
+    def add_markers(self, coordinates):
+        coordinates = np.array(coordinates, dtype=float).reshape(-1, 2)
+        self.clear_markers()
+        self.set_markers(np.arange(len(coordinates), dtype=np.int64), coordinates[:, 0], coordinates[:, 1],
+                         scale_view=True)
 
     @pyqtSlot()
     def clear_markers(self):
-        script = """
-        if (typeof markers !== 'undefined') {
-            markers.forEach(marker => map.removeLayer(marker));
-            markers = [];
-        }
-        """
-        self.view.page().runJavaScript(script)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.lats = np.empty(0)
+        self.lons = np.empty(0)
+        self.request_markers()
 
 
 class RectangleManager(QObject):
@@ -98,6 +131,9 @@ class MapWidget(QWidget):
             <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/leaflet.draw/1.0.4/leaflet.draw.css"/>
             <script src="https://unpkg.com/leaflet@1.7.1/dist/leaflet.js"></script>
             <script src="https://cdnjs.cloudflare.com/ajax/libs/leaflet.draw/1.0.4/leaflet.draw.js"></script>
+            <link rel="stylesheet" href="https://unpkg.com/leaflet.markercluster@1.5.3/dist/MarkerCluster.css" />
+            <link rel="stylesheet" href="https://unpkg.com/leaflet.markercluster@1.5.3/dist/MarkerCluster.Default.css" />
+            <script src="https://unpkg.com/leaflet.markercluster@1.5.3/dist/leaflet.markercluster.js"></script>
             <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
             <style>
                 body, html, #mapid { 
@@ -172,8 +208,43 @@ class MapWidget(QWidget):
         
                 tileLayer.addTo(map);
         
-                var markers = [];
                 var rectangles = [];
+
+                // Pinezki według numeru porządkowego pliku - Python wysyła tylko zmiany.
+                // Warstwa klastrów rysuje tylko widoczne grupy pinezek, więc mapa zostaje płynna
+                // przy dziesiątkach tysięcy zdjęć (bez wtyczki, np. offline - zwykła warstwa).
+                var markerLayer = (L.markerClusterGroup ? L.markerClusterGroup({ chunkedLoading: true }) : L.featureGroup()).addTo(map);
+                var markersById = {};
+
+                function updateMarkers(payload) {
+                    var change = JSON.parse(payload);
+                    if (change.reset) {
+                        markerLayer.clearLayers();
+                        markersById = {};
+                    }
+                    var removed = [];
+                    change.removed.forEach(function (id) {
+                        if (markersById[id]) {
+                            removed.push(markersById[id]);
+                            delete markersById[id];
+                        }
+                    });
+                    var added = new Array(change.ids.length);
+                    for (var i = 0; i < change.ids.length; i++) {
+                        added[i] = markersById[change.ids[i]] = L.marker([change.lats[i], change.lons[i]]);
+                    }
+                    if (markerLayer.addLayers) {
+                        // Zmiany hurtem - jedno przeliczenie klastrów zamiast jednego na pinezkę
+                        markerLayer.removeLayers(removed);
+                        markerLayer.addLayers(added);
+                    } else {
+                        removed.forEach(function (marker) { markerLayer.removeLayer(marker); });
+                        added.forEach(function (marker) { markerLayer.addLayer(marker); });
+                    }
+                    if (change.fit) {
+                        map.fitBounds(change.fit);
+                    }
+                }
         
                 var drawnItems = new L.FeatureGroup();
                 map.addLayer(drawnItems);
@@ -247,6 +318,8 @@ class MapWidget(QWidget):
                 new QWebChannel(qt.webChannelTransport, function(channel) {
                     window.markerManager = channel.objects.markerManager;
                     window.rectangleManager = channel.objects.rectangleManager;
+                    window.markerManager.markers_changed.connect(updateMarkers);
+                    window.markerManager.request_markers();
                 });
             </script>
         </body>
@@ -258,7 +331,7 @@ class MapWidget(QWidget):
         layout.addWidget(self.browser)
 
         self.channel = QWebChannel()
-        self.marker_manager = MarkerManager(self.browser)
+        self.marker_manager = MarkerManager()
         self.rectangle_manager = RectangleManager(timeline_widget)
         self.rectangle_manager.rectangle_selected.connect(self.on_rectangle_selected)
         self.channel.registerObject('markerManager', self.marker_manager)
@@ -266,46 +339,13 @@ class MapWidget(QWidget):
         self.browser.page().setWebChannel(self.channel)
 
     def show_markers(self, df, scale_view=True):
+        """Pokazuje pinezki wierszy df (bez współrzędnych są pomijane); wysyła tylko różnicę."""
         #print('MapWidget show_markers function')
-        coordinates = []
-        for index, row in df.iterrows():
-            coords = row['Koordynaty'].split(', ')
-            if len(coords) == 2:
-                try:
-                    lat, lon = float(coords[0]), float(coords[1])
-                    coordinates.append((lat, lon))
-                except ValueError:
-                    continue  # Ignorujemy nieprawidłowe wartości współrzędnych
-
-        # Składamy skrypt JavaScript do dodania znaczników
-        script = """
-        if (typeof markers === 'undefined') {
-            markers = [];
-        } else {
-            markers.forEach(marker => map.removeLayer(marker));
-            markers = [];
-        }
-        var bounds = [];
-        """
-
-        for lat, lon in coordinates:
-            script += f"""
-            var marker = L.marker([{lat}, {lon}]).addTo(map);
-            markers.push(marker);
-            bounds.push([{lat}, {lon}]);
-            """
-
-        # Przeskaluj mapę tylko wtedy, gdy scale_view == True
-        if scale_view:
-            script += """
-            if (bounds.length > 0) {
-                var boundsGroup = L.featureGroup(markers);
-                map.fitBounds(boundsGroup.getBounds());
-            }
-            """
-
-        self.browser.page().runJavaScript(script)  # Poprawione odwołanie do self.browser
-
+        lats = df['lat'].to_numpy()
+        lons = df['lon'].to_numpy()
+        valid = ~(np.isnan(lats) | np.isnan(lons))
+        self.marker_manager.set_markers(df['Liczba porządkowa'].to_numpy()[valid], lats[valid], lons[valid],
+                                        scale_view)
 
     def on_rectangle_selected(self, lat1, lon1, lat2, lon2):
         self.rectangle_selected.emit(lat1, lon1, lat2, lon2)
@@ -318,4 +358,4 @@ class MapWidget(QWidget):
         }
         """
         self.browser.page().runJavaScript(script)
-        self.marker_manager.clear_markers()  # Dodano czyszczenie znaczników
\ No newline at end of file
+        self.rectangle_manager.rectangle = None  # Prostokąt zniknął z mapy, więc nie filtruje już nowych plików
\ No newline at end of file
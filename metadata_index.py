@@ -0,0 +1,82 @@
+import json
+import sqlite3
+
+
+# Zmiana formatu przechowywanych metadanych wymaga podbicia wersji - stary indeks zostanie wtedy odrzucony
+INDEX_VERSION = 2
+
+
+class MetadataIndex:
+    """
+    Trwały indeks metadanych plików w bazie SQLite w katalogu cache.
+    Kluczem jest ścieżka, a wpis jest ważny tylko wtedy, gdy rozmiar i czas
+    modyfikacji pliku się nie zmieniły. Zapamiętywane są także pliki, których
+    nie udało się wczytać, aby nie analizować ich przy każdym skanowaniu.
+
+    Połączenie SQLite może być używane tylko w wątku, w którym zostało utworzone.
+    """
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != INDEX_VERSION:
+            self.conn.execute('DROP TABLE IF EXISTS files')
+            self.conn.execute(f'PRAGMA user_version={INDEX_VERSION}')
+
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                valid INTEGER NOT NULL,
+                metadata TEXT,
+                error TEXT
+            )
+        """)
+        self.conn.commit()
+        self.pending = []
+
+    def lookup(self, path, size, mtime_ns):
+        """
+        Zwraca krotkę (metadane lub None, opis błędu lub None), jeśli plik jest w indeksie
+        i się nie zmienił, albo None, gdy plik trzeba przeanalizować.
+        """
+        row = self.conn.execute(
+            'SELECT valid, metadata, error FROM files WHERE path = ? AND size = ? AND mtime_ns = ?',
+            (path, size, mtime_ns)
+        ).fetchone()
+        if row is None:
+            return None
+
+        valid, metadata, error = row
+        if valid:
+            return json.loads(metadata), None
+        return None, error
+
+    def contains_path(self, path):
+        """Czy plik był już kiedyś analizowany (niezależnie od tego, czy się od tego czasu zmienił)."""
+        return self.conn.execute('SELECT 1 FROM files WHERE path = ?', (path,)).fetchone() is not None
+
+    def store(self, path, size, mtime_ns, metadata, error):
+        """Dodaje wynik analizy pliku do kolejki zapisu (zapis następuje w flush)."""
+        self.pending.append((
+            path, size, mtime_ns,
+            1 if metadata is not None else 0,
+            json.dumps(metadata) if metadata is not None else None,
+            error
+        ))
+        if len(self.pending) >= 500:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.conn.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)', self.pending)
+            self.conn.commit()
+            self.pending = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,115 @@
+from collections import OrderedDict
+
+from PyQt5.QtGui import QImage, QImageReader
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QSize, pyqtSignal
+
+from thumbnail_grid import decode_thumbnail
+from thumbnail_cache import level_for
+
+
+# Ile sąsiednich plików (w każdą stronę) przygotowujemy z wyprzedzeniem
+PREVIEW_NEIGHBOURS = 2
+# Liczba podglądów trzymanych w pamięci (bieżący + sąsiedzi z obu stron)
+PREVIEW_BUFFER_SIZE = 2 * PREVIEW_NEIGHBOURS + 1
+# Liczba wątków dekodujących podglądy
+PREVIEW_THREADS = 2
+
+
+def decode_preview(filepath, size):
+    """
+    Dekoduje plik od razu do rozmiaru mieszczącego się w size (QSize).
+    Dla JPEG QImageReader dekoduje wtedy w zmniejszonej skali, bez pełnej rozdzielczości.
+    """
+    reader = QImageReader(filepath)
+    reader.setAutoTransform(True)  # Orientacja z EXIF
+    original = reader.size()
+    if original.isValid() and (original.width() > size.width() or original.height() > size.height()):
+        reader.setScaledSize(original.scaled(size, Qt.KeepAspectRatio))
+    return reader.read()
+
+
+class PreviewJob(QRunnable):
+    def __init__(self, loader, filepath, size):
+        super().__init__()
+        self.loader = loader
+        self.thumbnail_cache = loader.thumbnail_cache
+        self.filepath = filepath
+        self.size = size
+
+    def run(self):
+        image = QImage()
+        try:
+            image = decode_preview(self.filepath, self.size)
+            if image.isNull():
+                # Filmy i formaty nieobsługiwane przez Qt - pokazujemy największą miniaturkę z cache
+                image = self.loader.cached_thumbnail(self.filepath)
+        except Exception:
+            pass
+        try:
+            self.loader.preview_ready.emit(self.filepath, image)
+        except RuntimeError:
+            pass  # Obiekt odbiorcy usunięty w trakcie dekodowania (zamykanie aplikacji)
+
+
+class PreviewLoader(QObject):
+    """
+    Dekoduje podglądy w puli wątków i trzyma kilka ostatnich w buforze,
+    aby przechodzenie strzałkami do sąsiednich plików było natychmiastowe.
+    """
+    preview_ready = pyqtSignal(str, QImage)
+
+    def __init__(self, thumbnail_cache, size, parent=None):
+        super().__init__(parent)
+        self.thumbnail_cache = thumbnail_cache
+        self.size = QSize(size)
+        self.buffer = OrderedDict()  # ścieżka -> QImage
+        self.pending = set()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(PREVIEW_THREADS)
+        self.preview_ready.connect(self.on_preview_ready)
+
+    def get(self, filepath):
+        """Zwraca gotowy podgląd z bufora albo None."""
+        image = self.buffer.get(filepath)
+        if image is not None:
+            self.buffer.move_to_end(filepath)
+        return image
+
+    def cached_thumbnail(self, filepath):
+        """
+        Zwraca miniaturkę z cache w najmniejszym poziomie pokrywającym rozmiar podglądu
+        (pusty QImage, gdy jej brak). Dekodowanie trwa milisekundy, więc nadaje się
+        na zastępczy obraz, zanim podgląd oryginału będzie gotowy.
+        """
+        level = level_for(max(self.size.width(), self.size.height()))
+        found, data = self.thumbnail_cache.get_nearest(filepath, level)
+        if data is None:
+            return QImage()
+        return decode_thumbnail(data, level)
+
+    def request(self, filepath, priority=0):
+        if filepath in self.buffer or filepath in self.pending:
+            return
+        self.pending.add(filepath)
+        self.pool.start(PreviewJob(self, filepath, self.size), priority)
+
+    def load_around(self, filepaths, current):
+        """Zleca podgląd bieżącego pliku, a potem jego sąsiadów z obu stron."""
+        self.request(filepaths[current], priority=1)
+        for offset in range(1, PREVIEW_NEIGHBOURS + 1):
+            for neighbour in (current + offset, current - offset):
+                if 0 <= neighbour < len(filepaths):
+                    self.request(filepaths[neighbour])
+
+    def invalidate(self, filepaths):
+        for filepath in filepaths:
+            self.buffer.pop(filepath, None)
+
+    def on_preview_ready(self, filepath, image):
+        self.pending.discard(filepath)
+        if image.isNull():
+            return
+        self.buffer[filepath] = image
+        self.buffer.move_to_end(filepath)
+        while len(self.buffer) > PREVIEW_BUFFER_SIZE:
+            self.buffer.popitem(last=False)
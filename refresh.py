@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class ViewRefresher:
+    """
+    Odświeżanie widoków po zmianie danych (filtr daty lub obszaru, przypisanie grupy,
+    nowe lub usunięte pliki). Porównuje nowy stan aktywnej grupy z poprzednim
+    i przekazuje widokom tylko różnice:
+    - siatce miniaturek - wiersze, które weszły do widocznego zbioru lub z niego wypadły,
+    - mapie - dodane i usunięte pinezki,
+    - tabeli grup - liczności, które się zmieniły,
+    - osi czasu - znaczniki dni (grupowanie dni jest w cache, patrz TimelineWidget).
+    Zmiana aktywnej grupy odświeża widoki w całości.
+    """
+
+    def __init__(self, image_viewer, timeline_widget, table_widget, map_widget):
+        self.image_viewer = image_viewer
+        self.timeline_widget = timeline_widget
+        self.table_widget = table_widget
+        self.map_widget = map_widget
+        self.reset()
+
+    def reset(self):
+        self.group = None  # grupa pokazana przy ostatnim odświeżeniu
+        self.visible_ids = np.empty(0, dtype=np.int64)  # numery porządkowe miniaturek w siatce (w jej kolejności)
+        self.counts = {}  # grupa -> liczba plików pokazana w tabeli
+
+    def rename_group(self, old_group, new_group):
+        """Zmiana nazwy nie zmienia wierszy - przenosimy stan, aby nie odświeżać wszystkiego."""
+        if self.group == old_group:
+            self.group = new_group
+        if old_group in self.counts:
+            self.counts[new_group] = self.counts.get(new_group, 0) + self.counts.pop(old_group)
+
+    def refresh(self, df, group, group_index, scale_view=False):
+        # Oś czasu jako pierwsza: zgłasza zaznaczone dni, co może od razu zmienić date_mark
+        # (filter_by_date_range i zagnieżdżone odświeżenie) - znaczniki czytamy dopiero potem
+        positions = group_index.positions(group)
+        self.timeline_widget.set_photos(df, group, positions)
+
+        full = group != self.group
+        self.group = group
+        date_mark = df['date_mark'].to_numpy()[positions]
+        map_mark = df['map_mark'].to_numpy()[positions]
+        numbers = df['Liczba porządkowa'].to_numpy()
+
+        # Pinezki: wiersze grupy z date_mark (map_mark ich nie ukrywa)
+        marked = positions[date_mark]
+        self.map_widget.show_markers(df[['Liczba porządkowa', 'lat', 'lon']].iloc[marked], scale_view=scale_view or full)
+
+        # Miniaturki: wiersze grupy z date_mark i map_mark
+        visible = positions[date_mark & map_mark]
+        visible_ids = numbers[visible]
+        if full:
+            self.image_viewer.display_images(df.iloc[visible])
+        else:
+            removed_rows = np.flatnonzero(~np.isin(self.visible_ids, visible_ids))
+            inserted_rows = np.flatnonzero(~np.isin(visible_ids, self.visible_ids))
+            if len(removed_rows) or len(inserted_rows):
+                filepaths = df['Pełna ścieżka pliku'].to_numpy()[visible]
+                self.image_viewer.update_images(removed_rows, inserted_rows, filepaths)
+        self.visible_ids = visible_ids
+
+        # Tabela grup: liczności tylko tych grup, które się zmieniły (także grup, które opustoszały)
+        counts = {name: group_index.count(name) for name in group_index.groups()}
+        if full:
+            self.table_widget.update_table(df, group)
+        else:
+            changed = {name: count for name, count in counts.items() if self.counts.get(name) != count}
+            changed.update((name, 0) for name in self.counts if name not in counts)
+            if changed:
+                self.table_widget.update_counts(changed, group)
+        self.counts = counts
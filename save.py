@@ -2,15 +2,23 @@ import os
 import shutil
 from PyQt5.QtWidgets import QDialog, QMessageBox
 from save_dialog import SaveDialog
+from duplicates import EXACT_DUPLICATE, NEAR_DUPLICATE
 
 
 def save_images(df, save_dir):
     groups = df['Grupa'].unique()
-    dialog = SaveDialog(groups)
+    kinds = set(df['dup_kind'].unique()) if 'dup_kind' in df.columns else set()
+    dialog = SaveDialog(groups, EXACT_DUPLICATE in kinds, NEAR_DUPLICATE in kinds)
 
     if dialog.exec_() == QDialog.Accepted:
         action = dialog.get_action()
         selected_groups = dialog.get_selected_groups()
+        # Identyczne kopie są domyślnie pomijane, podobne zdjęcia tylko na życzenie użytkownika.
+        # Pliki wczytane po wyszukaniu duplikatów nie mają znacznika, więc zawsze zostają
+        skipped = [kind for kind, skip in ((EXACT_DUPLICATE, dialog.get_skip_duplicates()),
+                                           (NEAR_DUPLICATE, dialog.get_skip_near_duplicates())) if skip]
+        if skipped:
+            df = df[~df['dup_kind'].isin(skipped)]
 
         for group in selected_groups:
             group_dir = os.path.join(save_dir, group)
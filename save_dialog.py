@@ -4,7 +4,7 @@ from PyQt5.QtCore import Qt
 
 
 class SaveDialog(QDialog):
-    def __init__(self, groups, parent=None):
+    def __init__(self, groups, has_duplicates=False, has_near_duplicates=False, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Save Photos")
         self.setGeometry(100, 100, 400, 300)
@@ -44,6 +44,18 @@ class SaveDialog(QDialog):
 
         self.layout.addLayout(self.button_layout)
 
+        # Pomijanie nadmiarowych kopii - dostępne po wyszukaniu duplikatów
+        self.skip_duplicates_checkbox = QCheckBox("Skip identical copies")
+        self.skip_duplicates_checkbox.setChecked(has_duplicates)
+        self.skip_duplicates_checkbox.setEnabled(has_duplicates)
+        self.layout.addWidget(self.skip_duplicates_checkbox)
+
+        # Podobne zdjęcia (seria, edycja) mogą być różnymi zdjęciami - pomijamy je tylko na życzenie
+        self.skip_near_duplicates_checkbox = QCheckBox("Skip similar photos")
+        self.skip_near_duplicates_checkbox.setChecked(False)
+        self.skip_near_duplicates_checkbox.setEnabled(has_near_duplicates)
+        self.layout.addWidget(self.skip_near_duplicates_checkbox)
+
         self.select_all_button.clicked.connect(self.select_all)
         self.deselect_all_button.clicked.connect(self.deselect_all)
 
@@ -74,6 +86,12 @@ class SaveDialog(QDialog):
                 selected_groups.append(item.text())
         return selected_groups
 
+    def get_skip_duplicates(self):
+        return self.skip_duplicates_checkbox.isChecked()
+
+    def get_skip_near_duplicates(self):
+        return self.skip_near_duplicates_checkbox.isChecked()
+
     def get_action(self):
         if self.copy_radio.isChecked():
             return "copy"
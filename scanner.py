@@ -0,0 +1,240 @@
+import os
+import queue
+import threading
+
+
+class MediaScanner:
+    """
+    Strumieniowy skaner katalogów oparty na os.scandir.
+    Zwraca pary (ścieżka, stat) dla plików o podanych rozszerzeniach od razu w trakcie
+    przechodzenia drzewa, bez wcześniejszego liczenia wszystkich plików.
+    Dowiązania symboliczne do katalogów są odwiedzane, ale każdy katalog tylko raz,
+    więc pętle dowiązań nie zawieszają skanowania.
+    """
+
+    def __init__(self, root, extensions, visited=None):
+        self.root = root
+        self.extensions = tuple(extensions)
+        # (urządzenie, i-węzeł) odwiedzonych katalogów; można przekazać zbiór współdzielony z innym skanem
+        self.visited = visited if visited is not None else set()
+        self.directories = []  # przeskanowane katalogi (np. do obserwowania zmian)
+        self.files_found = 0
+        self.dirs_scanned = 0
+        self.dirs_pending = 0
+        self.finished = False
+
+    def __iter__(self):
+        visited = self.visited
+        try:
+            root_stat = os.stat(self.root)
+        except OSError:
+            self.finished = True
+            return
+        if (root_stat.st_dev, root_stat.st_ino) in visited:
+            self.finished = True
+            return
+        visited.add((root_stat.st_dev, root_stat.st_ino))
+
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            self.dirs_pending = len(stack)
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = list(iterator)
+            except OSError:
+                continue  # Brak uprawnień lub katalog zniknął w trakcie skanowania
+            self.directories.append(directory)
+
+            for entry in sorted(entries, key=lambda entry: entry.name):
+                try:
+                    if entry.is_dir():
+                        # os.stat podąża za dowiązaniem, więc (urządzenie, i-węzeł) wskazuje cel
+                        dir_stat = os.stat(entry.path)
+                        key = (dir_stat.st_dev, dir_stat.st_ino)
+                        if key not in visited:
+                            visited.add(key)
+                            stack.append(entry.path)
+                    elif entry.name.lower().endswith(self.extensions) and entry.is_file():
+                        # stat z DirEntry: na Windows bez dodatkowego wywołania systemowego
+                        stat = entry.stat()
+                        self.files_found += 1
+                        yield entry.path, stat
+                except OSError:
+                    continue
+
+            self.dirs_scanned += 1
+            self.dirs_pending = len(stack)
+
+        self.finished = True
+
+    def estimated_total(self):
+        """
+        Szacuje łączną liczbę plików na podstawie średniej liczby plików
+        w przeskanowanych katalogach i liczby katalogów czekających w kolejce.
+        """
+        if self.finished or self.dirs_scanned == 0:
+            return self.files_found
+        per_dir = self.files_found / self.dirs_scanned
+        return self.files_found + int(per_dir * self.dirs_pending)
+
+
+class MultiRootScanner:
+    """
+    Skanuje kilka katalogów głównych jednocześnie. Katalogi leżące na tym samym urządzeniu
+    (karta, dysk telefonu, zasób NAS) skanuje jeden wątek po kolei, a różne urządzenia
+    równolegle - każdy dysk czytany jest przez własny wątek. Wyniki trafiają do wspólnego
+    strumienia par (ścieżka, stat), tak jak z MediaScanner.
+    """
+
+    def __init__(self, roots, extensions):
+        self.roots = list(roots)
+        self.extensions = tuple(extensions)
+        self.visited = set()  # wspólny, aby zagnieżdżone katalogi główne nie były skanowane dwa razy
+        self.scanners = [MediaScanner(root, self.extensions, visited=self.visited) for root in self.roots]
+        self.finished = False
+
+    @property
+    def files_found(self):
+        return sum(scanner.files_found for scanner in self.scanners)
+
+    @property
+    def directories(self):
+        return [directory for scanner in self.scanners for directory in scanner.directories]
+
+    def estimated_total(self):
+        return sum(scanner.estimated_total() for scanner in self.scanners)
+
+    def __iter__(self):
+        # Grupowanie skanerów według urządzenia, na którym leży katalog główny
+        devices = {}
+        for scanner in self.scanners:
+            try:
+                device = os.stat(scanner.root).st_dev
+            except OSError:
+                device = scanner.root
+            devices.setdefault(device, []).append(scanner)
+
+        results = queue.Queue(maxsize=1000)
+        stop = threading.Event()
+        done = object()  # znacznik końca pracy jednego wątku
+
+        def scan_device(scanners):
+            try:
+                for scanner in scanners:
+                    for item in scanner:
+                        while not stop.is_set():
+                            try:
+                                results.put(item, timeout=0.1)
+                                break
+                            except queue.Full:
+                                continue
+                        if stop.is_set():
+                            return
+            finally:
+                results.put(done)
+
+        threads = [threading.Thread(target=scan_device, args=(scanners,), daemon=True)
+                   for scanners in devices.values()]
+        for thread in threads:
+            thread.start()
+
+        running = len(threads)
+        try:
+            while running:
+                item = results.get()
+                if item is done:
+                    running -= 1
+                    continue
+                yield item
+        finally:
+            # Przerwanie (np. anulowanie ładowania) - zatrzymujemy wątki i opróżniamy kolejkę
+            stop.set()
+            while running:
+                if results.get() is done:
+                    running -= 1
+            self.finished = True
+
+
+class PathListScanner:
+    """
+    Skaner jawnej listy plików (przyrostowe wczytywanie zmienionych plików)
+    z tym samym interfejsem co MediaScanner. Pliki, które zniknęły, są pomijane.
+    """
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.directories = []
+        self.files_found = 0
+        self.finished = False
+
+    def __iter__(self):
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            self.files_found += 1
+            yield path, stat
+        self.finished = True
+
+    def estimated_total(self):
+        return len(self.paths)
+
+
+class BackgroundScan:
+    """
+    Przechodzi skaner (dowolny z powyższych) w wątku w tle, aby koordynator ładowania
+    nie blokował się na wolnym dysku (NAS): take() zwraca to, co skaner zdążył już
+    znaleźć, czekając na pierwszy wynik najwyżej podany czas.
+    """
+
+    END = object()  # znacznik końca skanowania w kolejce
+
+    def __init__(self, scanner, maxsize=1000):
+        self.scanner = scanner
+        self.results = queue.Queue(maxsize=maxsize)
+        self.stop = threading.Event()
+        self.exhausted = False  # odebrano wszystkie wyniki skanera
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        iterator = iter(self.scanner)
+        try:
+            for item in iterator:
+                if not self.put(item):
+                    return
+        finally:
+            iterator.close()  # Zatrzymuje też wątki MultiRootScanner
+            self.put(self.END)
+
+    def put(self, item):
+        while not self.stop.is_set():
+            try:
+                self.results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def take(self, limit, timeout=0):
+        """Zwraca do limit par (ścieżka, stat); gdy nic nie czeka, czeka najwyżej timeout sekund."""
+        items = []
+        while len(items) < limit and not self.exhausted:
+            try:
+                if items or timeout <= 0:
+                    item = self.results.get_nowait()
+                else:
+                    item = self.results.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is self.END:
+                self.exhausted = True
+                break
+            items.append(item)
+        return items
+
+    def close(self):
+        """Przerywa skanowanie (wątek kończy się po bieżącym katalogu)."""
+        self.stop.set()
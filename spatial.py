@@ -0,0 +1,137 @@
+import math
+
+import numpy as np
+
+
+# Bok komórki siatki w stopniach (ok. 5 km szerokości geograficznej)
+SPATIAL_CELL_DEGREES = 0.05
+# Liczba komórek na jeden stopień - do zamiany współrzędnych na numery komórek
+CELLS_PER_DEGREE = 1 / SPATIAL_CELL_DEGREES
+# Przesunięcie numeru kolumny, aby klucz komórki był nieujemny
+CELL_COLUMNS = int(360 * CELLS_PER_DEGREE) + 1
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def cell_of(lat, lon):
+    """Numer wiersza i kolumny komórki siatki (działa na liczbach i tablicach NumPy)."""
+    return np.floor((np.asarray(lat) + 90) * CELLS_PER_DEGREE).astype(np.int64), \
+        np.floor((np.asarray(lon) + 180) * CELLS_PER_DEGREE).astype(np.int64)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Odległość po powierzchni Ziemi w kilometrach (wektorowo)."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class SpatialIndex:
+    """
+    Indeks przestrzenny wczytanych plików: jednolita siatka komórek SPATIAL_CELL_DEGREES,
+    osobna dla każdej grupy. Pliki identyfikuje 'Liczba porządkowa', która nie zmienia się
+    przy dokładaniu i usuwaniu wierszy. Zmiana grupy przenosi tylko zmienione wiersze
+    między komórkami, bez przebudowy indeksu.
+
+    Zapytanie o prostokąt przegląda niepuste komórki grupy (wektorowo): komórki w całości
+    wewnątrz prostokąta oddają wszystkie pliki bez sprawdzania, a współrzędne sprawdzane są
+    tylko w komórkach przeciętych brzegiem prostokąta.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.points = {}  # id -> (lat, lon, klucz komórki, grupa)
+        self.cells = {}  # grupa -> {klucz komórki: zbiór id}
+        self.cell_keys = {}  # grupa -> posortowana tablica kluczy niepustych komórek (odtwarzana leniwie)
+
+    def add(self, ids, lats, lons, groups):
+        """Dodaje pliki (pomija te bez współrzędnych); istniejące id są zastępowane."""
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+        valid = ~(np.isnan(lats) | np.isnan(lons))
+        rows, columns = cell_of(np.where(valid, lats, 0), np.where(valid, lons, 0))
+        keys = rows * CELL_COLUMNS + columns
+        self.remove(ids)
+        for point_id, lat, lon, key, group, ok in zip(ids, lats, lons, keys.tolist(), groups, valid):
+            if not ok:
+                continue
+            self.points[point_id] = (lat, lon, key, group)
+            self.cells.setdefault(group, {}).setdefault(key, set()).add(point_id)
+            self.cell_keys.pop(group, None)
+
+    def remove(self, ids):
+        for point_id in ids:
+            point = self.points.pop(point_id, None)
+            if point is None:
+                continue
+            lat, lon, key, group = point
+            cell = self.cells[group][key]
+            cell.discard(point_id)
+            if not cell:
+                del self.cells[group][key]
+                self.cell_keys.pop(group, None)
+
+    def move(self, ids, group):
+        """Przenosi pliki do innej grupy - koszt zależy tylko od liczby przenoszonych plików."""
+        for point_id in ids:
+            point = self.points.get(point_id)
+            if point is None or point[3] == group:
+                continue
+            lat, lon, key, old_group = point
+            self.remove([point_id])
+            self.points[point_id] = (lat, lon, key, group)
+            self.cells.setdefault(group, {}).setdefault(key, set()).add(point_id)
+            self.cell_keys.pop(group, None)
+
+    def rename_group(self, old_group, new_group):
+        if old_group not in self.cells:
+            return
+        if new_group in self.cells:
+            # Połączenie z istniejącą grupą
+            self.move([point_id for cell in self.cells[old_group].values() for point_id in cell], new_group)
+            return
+        self.cells[new_group] = self.cells.pop(old_group)
+        self.cell_keys.pop(old_group, None)
+        for cell in self.cells[new_group].values():
+            for point_id in cell:
+                lat, lon, key, group = self.points[point_id]
+                self.points[point_id] = (lat, lon, key, new_group)
+
+    def group_cells(self, group):
+        keys = self.cell_keys.get(group)
+        if keys is None:
+            keys = np.array(sorted(self.cells.get(group, {})), dtype=np.int64)
+            self.cell_keys[group] = keys
+        return keys
+
+    def query_bbox(self, lat1, lon1, lat2, lon2, group):
+        """Zwraca tablicę id plików grupy leżących w prostokącie (granice włącznie)."""
+        keys = self.group_cells(group)
+        if not len(keys):
+            return np.empty(0, dtype=np.int64)
+        rows, columns = keys // CELL_COLUMNS, keys % CELL_COLUMNS
+        row1, column1 = cell_of(lat1, lon1)
+        row2, column2 = cell_of(lat2, lon2)
+
+        touched = (rows >= row1) & (rows <= row2) & (columns >= column1) & (columns <= column2)
+        inside = touched & (rows > row1) & (rows < row2) & (columns > column1) & (columns < column2)
+
+        cells = self.cells[group]
+        found = [point_id for key in keys[inside].tolist() for point_id in cells[key]]
+        for key in keys[touched & ~inside].tolist():
+            for point_id in cells[key]:
+                lat, lon = self.points[point_id][:2]
+                if lat1 <= lat <= lat2 and lon1 <= lon <= lon2:
+                    found.append(point_id)
+        return np.array(found, dtype=np.int64)
+
+    def query_radius(self, lat, lon, radius_km, group):
+        """Zwraca tablicę id plików grupy odległych od punktu o co najwyżej radius_km kilometrów."""
+        dlat = radius_km / KM_PER_DEGREE
+        dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        candidates = self.query_bbox(lat - dlat, max(lon - dlon, -180), lat + dlat, min(lon + dlon, 180), group)
+        if not len(candidates):
+            return candidates
+        coordinates = np.array([self.points[point_id][:2] for point_id in candidates.tolist()])
+        return candidates[haversine_km(lat, lon, coordinates[:, 0], coordinates[:, 1]) <= radius_km]
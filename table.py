@@ -2,12 +2,14 @@ from PyQt5.QtWidgets import QWidget, QPushButton, QTableWidget, QTableWidgetItem
 from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtWidgets import QFileDialog, QMessageBox
 from save import save_images
+from groups import GroupIndex
 
 
 class TableWidget(QWidget):
     active_group_changed = pyqtSignal(str)
     group_updated = pyqtSignal(str)
     group_name_changed = pyqtSignal(str, str)
+    group_hovered = pyqtSignal(str)  # najechanie lub zaznaczenie wiersza grupy (do wczytania miniaturek z wyprzedzeniem)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -15,6 +17,8 @@ class TableWidget(QWidget):
         self.df = None  # Dodanie atrybutu df
         self.previous_group_name = None  # do sprawdzania, czy nazwa grupy się zmieniła
         self.custom_groups = []  # Zainicjuj custom_groups tutaj
+        self.hovered_row = None  # wiersz, dla którego ostatnio wysłano group_hovered
+        self.group_index = None  # indeks grup współdzielony z MainWindow (liczności bez skanowania df)
 
     def initUI(self):
         self.layout = QVBoxLayout(self)
@@ -45,6 +49,9 @@ class TableWidget(QWidget):
         self.add_row_button.clicked.connect(self.add_row)
         self.button_layout.addWidget(self.add_row_button)
 
+        self.duplicates_button = QPushButton('Find Duplicates', self)
+        self.button_layout.addWidget(self.duplicates_button)
+
         self.save_button = QPushButton('Save All', self)
         self.save_button.clicked.connect(self.save_all)
         self.button_layout.addWidget(self.save_button)
@@ -60,6 +67,19 @@ class TableWidget(QWidget):
         # Wywołanie funkcji, gdy zmieni się wartość w komórce w tabeli
         self.table.cellChanged.connect(self.on_group_name_changed)
 
+        # Najechanie myszą lub zaznaczenie wiersza - miniaturki grupy można przygotować wcześniej
+        self.table.setMouseTracking(True)
+        self.table.cellEntered.connect(self.on_row_hovered)
+        self.table.currentCellChanged.connect(lambda row, col, prev_row, prev_col: self.on_row_hovered(row, col))
+
+    def on_row_hovered(self, row, col):
+        if row == self.hovered_row:
+            return
+        self.hovered_row = row
+        group_item = self.table.item(row, 1)
+        if group_item:
+            self.group_hovered.emit(group_item.text())
+
     def on_group_name_click(self, row, col):
         """ Funkcja zapisuje nazwę grupy gdy któraś komórka w tabeli zostanie kliknięta"""
 #       #print('on_group_name_click funcion')
@@ -93,7 +113,7 @@ class TableWidget(QWidget):
                 self.custom_groups[self.custom_groups.index(self.previous_group_name)] = new_group_name
                 #print(f'Updated custom_groups: {self.custom_groups}')
 
-            # Wyemituj sygnał, aby zaktualizować nazwę grupy w self.df (wywołanie funkcji w main.py)
+            # Wyemituj sygnał, aby zaktualizować nazwę grupy w self.df (wywołanie funkcji w main_window.py)
             self.group_name_changed.emit(self.previous_group_name, new_group_name)
 
             # Zresetuj previous_group_name po zmianie
@@ -105,6 +125,9 @@ class TableWidget(QWidget):
     def set_df(self, df):
         self.df = df
 
+    def set_group_index(self, group_index):
+        self.group_index = group_index
+
     def save_all(self):
         if self.df is None:
             QMessageBox.critical(self, "Error", "No data available to save!")
@@ -127,9 +150,14 @@ class TableWidget(QWidget):
 
         # Wyczyszczenie tabeli
         self.table.setRowCount(0)
+        self.hovered_row = None
 
-        # Grupy i liczba plików w każdej grupie z df
-        groups = df['Grupa'].unique()
+        # Grupy i liczba plików w każdej grupie z indeksu grup
+        group_index = self.group_index
+        if group_index is None:
+            group_index = GroupIndex()
+            group_index.rebuild(df['Grupa'].tolist())
+        groups = group_index.groups()
 
         # Zaktualizuj listę, uwzględniając tylko nowe grupy
         new_groups = [group for group in groups if group not in self.custom_groups]
@@ -137,7 +165,7 @@ class TableWidget(QWidget):
         #print(f'self.custom_groups in update_table funcion {self.custom_groups}')
         # Wyświetl wszystkie grupy, w tym puste
         for group in self.custom_groups:
-            count = len(df[df['Grupa'] == group])
+            count = group_index.count(group)
 
             # Dodanie wiersza do tabeli
             row_position = self.table.rowCount()
@@ -171,6 +199,26 @@ class TableWidget(QWidget):
         # Odblokuj sygnały po zakończeniu operacji
         self.table.blockSignals(False)
 
+    def update_counts(self, counts, current_group):
+        """
+        Zmienia tylko liczby plików podanych grup (słownik grupa -> liczba) bez przebudowy tabeli.
+        Grupa, której jeszcze nie ma w tabeli, wymaga pełnego update_table.
+        """
+        if any(count and group not in self.custom_groups for group, count in counts.items()):
+            self.update_table(self.df, current_group)
+            return
+
+        self.table.blockSignals(True)
+        for row in range(self.table.rowCount()):
+            group = self.table.item(row, 1).text()
+            if group in counts:
+                item = self.table.item(row, 0)
+                if item is None:  # Nowo dodana grupa nie ma jeszcze komórki
+                    self.table.setItem(row, 0, QTableWidgetItem(str(counts[group])))
+                else:
+                    item.setText(str(counts[group]))  # Zachowuje zielone tło aktywnej grupy
+        self.table.blockSignals(False)
+
 
     def add_row(self):
         #print('add_row function')
@@ -233,5 +281,6 @@ class TableWidget(QWidget):
     def clear(self):
         #print('clear funcion')
         self.table.setRowCount(0)
+        self.hovered_row = None
         self.custom_groups = []
         self.group_counter = 1
@@ -0,0 +1,280 @@
+import os
+import glob
+import mmap
+import shutil
+import time
+import sqlite3
+import hashlib
+import platform
+import threading
+from collections import OrderedDict
+
+
+# Domyślny limit rozmiaru miniaturek 100 px (w bajtach): ok. 6 KB na plik, czyli ok. 170 tys. plików -
+# cała typowa biblioteka, aby siatka i wyszukiwanie duplikatów nie traciły miniaturek
+DEFAULT_CACHE_BUDGET = 1024 * 1024 * 1024
+# Domyślne limity większych poziomów (ok. 20 KB i 50 KB na plik) - mieszczą ostatnio używane
+# kilkadziesiąt tysięcy plików; po ich usunięciu widoki używają mniejszego poziomu
+DEFAULT_LEVEL_BUDGETS = {256: 1024 * 1024 * 1024, 512: 1024 * 1024 * 1024}
+# Poniżej tej liczby martwych bajtów nie opłaca się przepisywać pliku
+COMPACT_MIN_BYTES = 16 * 1024 * 1024
+# Zmiana formatu przechowywania wymaga podbicia wersji - stary cache zostanie wtedy usunięty
+CACHE_VERSION = 3
+# Rozmiary miniaturek (dłuższy bok w pikselach) tworzone z jednego dekodowania oryginału
+THUMBNAIL_LEVELS = (100, 256, 512)
+
+
+def level_for(size):
+    """Zwraca najmniejszy poziom miniaturki, który pokryje podany rozmiar (albo największy)."""
+    for level in THUMBNAIL_LEVELS:
+        if level >= size:
+            return level
+    return THUMBNAIL_LEVELS[-1]
+
+
+def get_cache_dir():
+    """Zwraca katalog cache aplikacji i tworzy go, jeśli nie istnieje."""
+    # Wybór ścieżki w zależności od systemu operacyjnego
+    if platform.system() == "Windows":
+        base_cache_dir = os.path.join(os.getenv('LOCALAPPDATA'), 'PixTidy', 'cache')
+    elif platform.system() == "Linux":
+        base_cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'pixtidy')
+    else:
+        raise Exception("Unsupported operating system")
+
+    os.makedirs(base_cache_dir, exist_ok=True)
+    return base_cache_dir
+
+
+class ThumbnailCache:
+    """
+    Trwały cache miniaturek (JPEG) współdzielony przez ładowanie plików i widok miniaturek.
+    Każdy plik ma miniaturki w kilku rozmiarach (THUMBNAIL_LEVELS), zapisywane pod osobnymi kluczami.
+    Wszystkie miniaturki leżą w jednym pliku thumbnails.pack, do którego tylko dopisujemy,
+    a indeks (klucz -> przesunięcie, rozmiar, czas użycia) trzymany jest w pamięci i w SQLite.
+    Odczyt idzie przez mmap, więc strona siatki miniaturek to wycinki jednego zmapowanego
+    obszaru, bez otwierania plików. Każdy poziom ma własny limit rozmiaru i własną kolejkę LRU:
+    po przekroczeniu limitu najdawniej używane wpisy tego poziomu są usuwane z indeksu,
+    a ich miejsce w pliku odzyskuje compact(). Większe poziomy nie wypierają miniaturek 100 px,
+    a usunięcie miniaturki 100 px usuwa też większe poziomy tego pliku - plik ma wtedy w cache
+    wszystko albo nic z tego, czego potrzebuje ładowanie (contains sprawdza poziom 100 px).
+
+    Obiekt jest bezpieczny dla wątków: zapisuje koordynator ładowania, czyta wątek GUI.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_CACHE_BUDGET, level_budgets=None):
+        if cache_dir is None:
+            cache_dir = get_cache_dir()
+        self.pack_path = os.path.join(cache_dir, 'thumbnails.pack')
+        # poziom -> limit bajtów; max_bytes dotyczy najmniejszego poziomu (siatka, duplikaty)
+        self.budgets = {THUMBNAIL_LEVELS[0]: max_bytes, **DEFAULT_LEVEL_BUDGETS, **(level_budgets or {})}
+        self.lock = threading.RLock()
+
+        self.db = sqlite3.connect(os.path.join(cache_dir, 'thumbnails.db'), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        if self.db.execute('PRAGMA user_version').fetchone()[0] != CACHE_VERSION:
+            # Poprzedni format (osobny plik na miniaturkę) - zaczynamy od pustego cache
+            self.db.execute('DROP TABLE IF EXISTS entries')
+            self.db.execute(f'PRAGMA user_version={CACHE_VERSION}')
+            shutil.rmtree(os.path.join(cache_dir, 'thumbnails'), ignore_errors=True)
+            if os.path.exists(self.pack_path):
+                os.remove(self.pack_path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                level INTEGER NOT NULL,
+                path TEXT NOT NULL
+            )
+        """)
+        self.db.commit()
+
+        # Tryb a+b: zapis zawsze na końcu pliku, a deskryptor nadaje się też do mmap
+        self.pack = open(self.pack_path, 'a+b')
+        self.pack_size = self.pack.seek(0, os.SEEK_END)
+        self.map = None
+        self.mapped_size = 0
+
+        # klucz -> [przesunięcie, rozmiar, czas ostatniego użycia, poziom, ścieżka]
+        self.entries = {}
+        # poziom -> kolejność LRU jego kluczy (od najdawniej używanych) i bajty jego żywych wpisów
+        self.lru = {level: OrderedDict() for level in THUMBNAIL_LEVELS}
+        self.level_bytes = dict.fromkeys(THUMBNAIL_LEVELS, 0)
+        self.total_bytes = 0  # bajty żywych wpisów (plik może być większy o usunięte wpisy)
+        rows = self.db.execute('SELECT key, offset, size, last_used, level, path FROM entries ORDER BY last_used')
+        for key, offset, size, last_used, level, path in rows:
+            # Wpisy spoza pliku (np. po awarii) i poziomy, których już nie tworzymy, pomijamy
+            if offset + size <= self.pack_size and level in self.lru:
+                self.add_entry(key, [offset, size, last_used, level, path])
+        self.dirty = set()  # klucze dodane lub użyte od ostatniego flush
+        self.removed = set()  # klucze usunięte od ostatniego flush
+
+        # Miniaturki PNG z poprzednich wersji leżą bezpośrednio w katalogu cache
+        for legacy_path in glob.glob(os.path.join(cache_dir, '*.png')):
+            try:
+                os.remove(legacy_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def key(filepath, level=THUMBNAIL_LEVELS[0]):
+        # Tworzenie unikalnej nazwy na podstawie ścieżki i rozmiaru miniaturki
+        return hashlib.md5(f'{level}:{filepath}'.encode()).hexdigest()
+
+    def contains(self, filepath, level=THUMBNAIL_LEVELS[0]):
+        with self.lock:
+            return self.key(filepath, level) in self.entries
+
+    def read(self, key):
+        offset, size = self.entries[key][:2]
+        if offset + size > self.mapped_size:
+            # Plik urósł od ostatniego mapowania - mapujemy go ponownie w całości
+            if self.map is not None:
+                self.map.close()
+            self.map = mmap.mmap(self.pack.fileno(), 0, access=mmap.ACCESS_READ)
+            self.mapped_size = len(self.map)
+        self.touch(key)
+        return self.map[offset:offset + size]
+
+    def get(self, filepath, level=THUMBNAIL_LEVELS[0]):
+        """Zwraca bajty miniaturki albo None, jeśli nie ma jej w cache."""
+        return self.get_many([filepath], level)[0]
+
+    def get_many(self, filepaths, level=THUMBNAIL_LEVELS[0]):
+        """Zwraca listę bajtów miniaturek (None dla brakujących) - jedna blokada i jedno mapowanie."""
+        with self.lock:
+            keys = [self.key(filepath, level) for filepath in filepaths]
+            return [self.read(key) if key in self.entries else None for key in keys]
+
+    def get_nearest(self, filepath, level):
+        """Zwraca (poziom, bajty) miniaturki podanego poziomu, a gdy jej brak - największej mniejszej."""
+        with self.lock:
+            for candidate in sorted((lvl for lvl in THUMBNAIL_LEVELS if lvl <= level), reverse=True):
+                key = self.key(filepath, candidate)
+                if key in self.entries:
+                    return candidate, self.read(key)
+        return None, None
+
+    def put_levels(self, filepath, levels):
+        """Zapisuje miniaturki wszystkich rozmiarów jednego pliku (słownik poziom -> bajty)."""
+        with self.lock:
+            for level, data in levels.items():
+                self.put(filepath, data, level)
+
+    def put(self, filepath, data, level=THUMBNAIL_LEVELS[0]):
+        """Dopisuje miniaturkę na końcu pliku i pilnuje limitu rozmiaru."""
+        key = self.key(filepath, level)
+        with self.lock:
+            offset = self.pack_size
+            self.pack.write(data)
+            self.pack.flush()
+            self.pack_size += len(data)
+
+            if key in self.entries:
+                self.discard(key)
+            self.add_entry(key, [offset, len(data), time.time(), level, filepath])
+            self.dirty.add(key)
+            self.removed.discard(key)
+            self.evict(level)
+
+    def add_entry(self, key, entry):
+        level, size = entry[3], entry[1]
+        self.entries[key] = entry
+        self.lru[level][key] = None
+        self.level_bytes[level] += size
+        self.total_bytes += size
+
+    def touch(self, key):
+        entry = self.entries[key]
+        entry[2] = time.time()
+        self.lru[entry[3]].move_to_end(key)
+        self.dirty.add(key)
+
+    def discard(self, key):
+        offset, size, last_used, level, filepath = self.entries.pop(key)
+        del self.lru[level][key]
+        self.level_bytes[level] -= size
+        self.total_bytes -= size
+        self.dirty.discard(key)
+        self.removed.add(key)
+
+    def evict(self, level):
+        """
+        Usuwa z indeksu najdawniej używane miniaturki poziomu, dopóki nie zmieści się on w swoim limicie.
+        Razem z miniaturką 100 px znikają większe poziomy tego samego pliku.
+        """
+        lru = self.lru[level]
+        while self.level_bytes[level] > self.budgets[level] and lru:
+            key = next(iter(lru))
+            filepath = self.entries[key][4]
+            self.discard(key)
+            if level == THUMBNAIL_LEVELS[0]:
+                for larger in THUMBNAIL_LEVELS[1:]:
+                    larger_key = self.key(filepath, larger)
+                    if larger_key in self.entries:
+                        self.discard(larger_key)
+
+    def compact(self):
+        """
+        Przepisuje plik, zostawiając tylko wpisy obecne w indeksie (usunięte przez LRU
+        i nadpisane miniaturki przestają zajmować miejsce).
+        """
+        with self.lock:
+            tmp_path = self.pack_path + '.tmp'
+            new_offsets = {}
+            with open(self.pack_path, 'rb') as source, open(tmp_path, 'wb') as target:
+                # Kolejność z pliku - miniaturki wczytane razem zostają obok siebie
+                for key, entry in sorted(self.entries.items(), key=lambda item: item[1][0]):
+                    offset, size = entry[:2]
+                    source.seek(offset)
+                    new_offsets[key] = target.tell()
+                    target.write(source.read(size))
+
+            # Na Windows nie można podmienić pliku, który jest otwarty lub zmapowany
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+                self.mapped_size = 0
+            self.pack.close()
+            os.replace(tmp_path, self.pack_path)
+            self.pack = open(self.pack_path, 'a+b')
+            self.pack_size = self.pack.seek(0, os.SEEK_END)
+
+            for key, offset in new_offsets.items():
+                self.entries[key][0] = offset
+            self.db.execute('DELETE FROM entries')
+            self.db.executemany('INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                                [(key, *entry) for key, entry in self.entries.items()])
+            self.db.commit()
+            self.dirty = set()
+            self.removed = set()
+
+    def flush(self):
+        """Zapisuje do bazy zmiany kolejności LRU, nowe i usunięte wpisy; w razie potrzeby kompaktuje plik."""
+        with self.lock:
+            # Kompaktujemy, gdy martwe bajty zajmują więcej niż połowę pliku
+            if self.pack_size - self.total_bytes > max(self.total_bytes, COMPACT_MIN_BYTES):
+                self.compact()
+                return
+
+            if self.dirty:
+                self.db.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                                    [(key, *self.entries[key]) for key in self.dirty])
+            if self.removed:
+                self.db.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key in self.removed])
+            self.db.commit()
+            self.dirty = set()
+            self.removed = set()
+
+
+_thumbnail_cache = None
+
+
+def get_thumbnail_cache():
+    """Zwraca wspólną dla całej aplikacji instancję cache miniaturek."""
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        _thumbnail_cache = ThumbnailCache()
+    return _thumbnail_cache
@@ -0,0 +1,302 @@
+import numpy as np
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+from PyQt5.QtGui import QPixmap, QPixmapCache, QColor, QImage, QImageReader
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, QRect, QThreadPool, QRunnable, QBuffer, QByteArray, QIODevice, QThread, pyqtSignal
+
+from thumbnail_cache import THUMBNAIL_LEVELS, level_for
+
+
+# Rozmiar miniaturki w siatce (domyślny i zakres suwaka) oraz margines komórki
+GRID_THUMBNAIL_SIZE = 100
+GRID_THUMBNAIL_MIN = 64
+GRID_THUMBNAIL_MAX = THUMBNAIL_LEVELS[-1]
+GRID_CELL_MARGIN = 10
+# Limit pamięci (w KB) na zdekodowane miniaturki, wspólny dla wszystkich grup i filtrów
+PIXMAP_CACHE_LIMIT_KB = 96 * 1024
+# Ile pierwszych miniaturek grupy dekodujemy z wyprzedzeniem (kilka ekranów siatki)
+PREFETCH_COUNT = 300
+# Liczba wątków dekodujących miniaturki (jeden rdzeń zostawiamy dla GUI)
+DECODE_THREADS = max(1, min(4, QThread.idealThreadCount() - 1))
+# Priorytety zadań w puli: widoczne komórki przed wczytywaniem z wyprzedzeniem
+VISIBLE_PRIORITY = 1
+PREFETCH_PRIORITY = 0
+# Powyżej tylu osobnych zakresów zmian siatka jest przebudowywana jednym resetem modelu
+MAX_DIFF_RUNS = 64
+# Rola z pełną ścieżką pliku
+FilePathRole = Qt.UserRole + 1
+
+
+def decode_thumbnail(data, size):
+    """Dekoduje bajty miniaturki do QImage zmieszczonego w kwadracie size x size."""
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.ReadOnly)
+    reader = QImageReader(buffer)
+    original = reader.size()
+    if original.isValid() and (original.width() > size or original.height() > size):
+        # Dekodowanie od razu do docelowego rozmiaru (dla JPEG bez pełnego dekodowania)
+        reader.setScaledSize(original.scaled(size, size, Qt.KeepAspectRatio))
+    return reader.read()
+
+
+class ThumbnailLoadJob(QRunnable):
+    """
+    Zadanie puli wątków: odczyt miniaturki podanego poziomu z cache i dekodowanie do QImage.
+    Gdy poziomu nie ma w cache (np. usunięty przez LRU), bierzemy największy mniejszy.
+    """
+
+    def __init__(self, model, filepath, level, visible):
+        super().__init__()
+        # Obiekt zostaje w słowniku modelu, aby można go było anulować przez tryTake
+        self.setAutoDelete(False)
+        self.model = model
+        self.thumbnail_cache = model.thumbnail_cache
+        self.filepath = filepath
+        self.level = level
+        self.visible = visible
+
+    def run(self):
+        image = QImage()
+        try:
+            found, data = self.thumbnail_cache.get_nearest(self.filepath, self.level)
+            if data is not None:
+                image = decode_thumbnail(data, self.level)
+        except Exception:
+            pass
+        # Sygnał modelu trafia do wątku GUI przez kolejkę zdarzeń
+        try:
+            self.model.thumbnail_decoded.emit(self.filepath, self.level, image)
+        except RuntimeError:
+            pass  # Obiekt odbiorcy usunięty w trakcie dekodowania (zamykanie aplikacji)
+
+
+def row_runs(rows):
+    """Dzieli posortowane numery wierszy na ciągłe zakresy [(pierwszy, ostatni), ...]."""
+    rows = np.asarray(rows)
+    if not len(rows):
+        return []
+    breaks = np.flatnonzero(np.diff(rows) != 1)
+    firsts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    lasts = np.concatenate((rows[breaks], [rows[-1]]))
+    return list(zip(firsts.tolist(), lasts.tolist()))
+
+
+class ThumbnailModel(QAbstractListModel):
+    """
+    Model listy plików dla siatki miniaturek. Trzyma tylko ścieżki, a miniaturki
+    dekoduje w puli wątków dopiero wtedy, gdy widok poprosi o nie dla widocznej komórki;
+    do tego czasu komórka pokazuje zaślepkę. Zdekodowane miniaturki trafiają do
+    QPixmapCache, więc przełączanie między grupami i filtrami nie dekoduje ponownie
+    tych samych plików. Poziom miniaturek (100/256/512) wynika z rozmiaru komórek
+    ustawionego suwakiem - zmiana rozmiaru nie wymaga ponownego wczytywania katalogu.
+    """
+    thumbnail_decoded = pyqtSignal(str, int, QImage)
+
+    def __init__(self, thumbnail_cache, parent=None):
+        super().__init__(parent)
+        self.thumbnail_cache = thumbnail_cache
+        self.filepaths = []
+        self.rows = {}  # ścieżka -> numer wiersza (do odświeżenia komórki po dekodowaniu)
+        self.pending = {}  # ścieżka -> zadanie w puli
+        self.missing = set()  # pliki bez miniaturki (nie zlecamy ich ponownie)
+        self.thumbnail_size = GRID_THUMBNAIL_SIZE
+        self.level = level_for(GRID_THUMBNAIL_SIZE)
+        QPixmapCache.setCacheLimit(PIXMAP_CACHE_LIMIT_KB)
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(DECODE_THREADS)
+        self.thumbnail_decoded.connect(self.on_thumbnail_decoded)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.filepaths)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        filepath = self.filepaths[index.row()]
+        if role == Qt.DecorationRole:
+            return self.pixmap(filepath)
+        if role in (Qt.ToolTipRole, FilePathRole):
+            return filepath
+        return None
+
+    def set_thumbnail_size(self, size, pixel_ratio=1.0):
+        """Ustawia rozmiar miniaturek w siatce i wybiera najmniejszy poziom, który go pokryje."""
+        self.thumbnail_size = size
+        level = level_for(size * pixel_ratio)
+        if level != self.level:
+            self.level = level
+            self.cancel_invisible(())
+
+    def pixmap(self, filepath):
+        """Zwraca gotową miniaturkę (QPixmap) albo None i zleca jej dekodowanie."""
+        pixmap = QPixmapCache.find(f'thumb:{self.level}:{filepath}')
+        if pixmap is not None and not pixmap.isNull():
+            return pixmap
+        self.request(filepath, visible=True)
+        return None
+
+    def request(self, filepath, visible):
+        if filepath in self.missing:
+            return
+        job = self.pending.get(filepath)
+        if job is not None and job.level == self.level:
+            if visible and not job.visible and self.pool.tryTake(job):
+                del self.pending[filepath]  # Prefetch staje się pilny - zlecamy z wyższym priorytetem
+            else:
+                return
+        job = ThumbnailLoadJob(self, filepath, self.level, visible)
+        self.pending[filepath] = job
+        self.pool.start(job, VISIBLE_PRIORITY if visible else PREFETCH_PRIORITY)
+
+    def on_thumbnail_decoded(self, filepath, level, image):
+        job = self.pending.get(filepath)
+        if job is not None and job.level == level:
+            del self.pending[filepath]
+        if image.isNull():
+            self.missing.add(filepath)
+            return
+        # QPixmap można tworzyć tylko w wątku GUI
+        QPixmapCache.insert(f'thumb:{level}:{filepath}', QPixmap.fromImage(image))
+        row = self.rows.get(filepath)
+        if row is not None and level == self.level:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def cancel_invisible(self, visible_paths):
+        """Anuluje zadania dla komórek, które zniknęły z widoku (jeszcze nie rozpoczęte)."""
+        for filepath, job in list(self.pending.items()):
+            if job.visible and filepath not in visible_paths and self.pool.tryTake(job):
+                del self.pending[filepath]
+
+    def invalidate(self, filepaths):
+        """Usuwa zdekodowane miniaturki plików, które się zmieniły, i odświeża ich komórki."""
+        for filepath in filepaths:
+            for level in THUMBNAIL_LEVELS:
+                QPixmapCache.remove(f'thumb:{level}:{filepath}')
+            self.missing.discard(filepath)
+            row = self.rows.get(filepath)
+            if row is not None:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def prefetch(self, filepaths):
+        """Zleca z niskim priorytetem dekodowanie pierwszych miniaturek podanych plików."""
+        for filepath in filepaths[:PREFETCH_COUNT]:
+            pixmap = QPixmapCache.find(f'thumb:{self.level}:{filepath}')
+            if pixmap is None or pixmap.isNull():
+                self.request(filepath, visible=False)
+
+    def set_files(self, filepaths):
+        """Podmienia całą zawartość siatki (zmiana grupy lub filtra)."""
+        self.beginResetModel()
+        self.filepaths = list(filepaths)
+        self.rows = {filepath: row for row, filepath in enumerate(self.filepaths)}
+        self.endResetModel()
+        self.cancel_invisible(())
+
+    def apply_changes(self, removed_rows, inserted_rows, filepaths):
+        """
+        Aktualizuje siatkę o różnicę: usuwa wiersze removed_rows (numery w obecnej liście),
+        a potem wstawia wiersze inserted_rows (numery w nowej liście filepaths).
+        Pozostałe komórki zostają na miejscu, więc widok nie traci przewinięcia ani zaznaczenia.
+        Przy bardzo rozproszonych zmianach jeden reset modelu jest tańszy niż tyle sygnałów.
+        """
+        removed_runs, inserted_runs = row_runs(removed_rows), row_runs(inserted_rows)
+        if len(removed_runs) + len(inserted_runs) > MAX_DIFF_RUNS:
+            self.set_files(filepaths)
+            return
+
+        for first, last in reversed(removed_runs):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.filepaths[first:last + 1]
+            self.endRemoveRows()
+        for first, last in inserted_runs:
+            self.beginInsertRows(QModelIndex(), first, last)
+            inserted = list(filepaths[first:last + 1])
+            self.filepaths[first:first] = inserted
+            self.missing.difference_update(inserted)  # Nowy lub zmieniony plik mógł już mieć miniaturkę
+            self.endInsertRows()
+        self.rows = {filepath: row for row, filepath in enumerate(self.filepaths)}
+        # Anulujemy dekodowanie komórek, które wypadły z siatki
+        for filepath, job in list(self.pending.items()):
+            if job.visible and filepath not in self.rows and self.pool.tryTake(job):
+                del self.pending[filepath]
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """Rysuje miniaturkę wyśrodkowaną w komórce; brakującą miniaturkę zastępuje szary prostokąt."""
+
+    def paint(self, painter, option, index):
+        rect = option.rect
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(rect, option.palette.highlight())
+
+        size = index.model().thumbnail_size
+        pixmap = index.data(Qt.DecorationRole)
+        if pixmap is None:
+            placeholder = QRect(0, 0, size * 3 // 4, size * 3 // 4)
+            placeholder.moveCenter(rect.center())
+            painter.fillRect(placeholder, QColor(200, 200, 200))
+            return
+
+        target = QRect(0, 0, size, size)
+        scaled = pixmap.size().scaled(target.size(), Qt.KeepAspectRatio)
+        target.setSize(scaled)
+        target.moveCenter(rect.center())
+        painter.drawPixmap(target, pixmap)
+
+    def sizeHint(self, option, index):
+        cell = index.model().thumbnail_size + GRID_CELL_MARGIN
+        return QSize(cell, cell)
+
+
+class ThumbnailView(QListView):
+    """
+    Siatka miniaturek w trybie ikon. Komórki mają stały rozmiar, więc widok
+    liczy układ bez pytania o każdy element i rysuje tylko widoczne komórki.
+    Spacja lub Enter na zaznaczonej komórce otwiera podgląd.
+    """
+    preview_requested = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.IconMode)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setGridSize(QSize(GRID_THUMBNAIL_SIZE + GRID_CELL_MARGIN, GRID_THUMBNAIL_SIZE + GRID_CELL_MARGIN))
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setItemDelegate(ThumbnailDelegate(self))
+        self.verticalScrollBar().valueChanged.connect(self.cancel_scrolled_out)
+
+    def visible_paths(self):
+        """Ścieżki plików w komórkach widocznych w oknie siatki."""
+        model = self.model()
+        rect = self.viewport().rect()
+        first = self.indexAt(rect.topLeft())
+        if not first.isValid():
+            return set()
+        # Komórki mają stały rozmiar, więc zakres widocznych wierszy wynika z wymiarów okna
+        cell = self.gridSize()
+        per_line = max(1, rect.width() // cell.width())
+        lines = rect.height() // cell.height() + 2
+        return set(model.filepaths[first.row():first.row() + per_line * lines])
+
+    def set_thumbnail_size(self, size):
+        """Zmienia rozmiar komórek; miniaturki bierzemy z gotowego poziomu w cache."""
+        self.model().set_thumbnail_size(size, self.devicePixelRatioF())
+        self.setGridSize(QSize(size + GRID_CELL_MARGIN, size + GRID_CELL_MARGIN))
+        self.doItemsLayout()  # Przy stałym rozmiarze elementów widok zapamiętuje sizeHint - liczymy układ od nowa
+        self.viewport().update()
+
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key_Space, Qt.Key_Return, Qt.Key_Enter) and self.currentIndex().isValid():
+            self.preview_requested.emit(self.currentIndex().row())
+        else:
+            super().keyPressEvent(event)
+
+    def cancel_scrolled_out(self):
+        if self.model() is not None:
+            self.model().cancel_invisible(self.visible_paths())
@@ -1,10 +1,112 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QCheckBox, \
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableView, QHeaderView, \
     QAbstractItemView, QPushButton
-from PyQt5.QtCore import Qt, pyqtSignal
-import pandas as pd
+from PyQt5.QtCore import Qt, pyqtSignal, QAbstractTableModel, QModelIndex
+import numpy as np
 import datetime
 
 
+def aggregate_days(taken_at):
+    """
+    Grupuje zdjęcia po dniu zrobienia (jedno wektorowe grupowanie). Zwraca dni malejąco
+    jako datetime64[D], numer dnia każdego zdjęcia (-1 dla NaT), liczność dni
+    i pozycję pierwszego zdjęcia każdego dnia.
+    """
+    days = taken_at.astype('datetime64[D]')
+    valid = np.flatnonzero(~np.isnat(days))
+    unique_days, first, inverse = np.unique(days[valid], return_index=True, return_inverse=True)
+    codes = np.full(len(days), -1, dtype=np.intp)
+    codes[valid] = len(unique_days) - 1 - inverse  # Od najnowszej do najstarszej
+    counts = np.bincount(codes[valid], minlength=len(unique_days))
+    return unique_days[::-1], codes, counts, valid[first][::-1]
+
+
+class TimelineModel(QAbstractTableModel):
+    """
+    Model osi czasu: jeden wiersz na dzień, dane w tablicach NumPy.
+    Zaznaczenie dnia jest trzymane jako wartość logiczna przy prawdziwym kluczu daty,
+    a tekst daty powstaje dopiero przy rysowaniu widocznych wierszy.
+    """
+    HEADERS = ['Date Taken', 'Number of Photos', 'Select']
+    selection_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.set_days(np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype=np.intp),
+                      np.empty(0, dtype=bool), np.empty(0, dtype=bool))
+
+    def set_days(self, days, counts, disabled, checked):
+        self.beginResetModel()
+        self.days = days
+        self.counts = counts
+        self.disabled = disabled  # wszystkie zdjęcia dnia mają map_mark == False
+        self.checked = checked
+        self.endResetModel()
+
+    def update_flags(self, disabled, checked):
+        """Zmienia znaczniki tych samych dni - odświeża tylko zakres wierszy, które się zmieniły."""
+        changed = np.flatnonzero((disabled != self.disabled) | (checked != self.checked))
+        self.disabled = disabled
+        self.checked = checked
+        if len(changed):
+            self.dataChanged.emit(self.index(int(changed[0]), 0), self.index(int(changed[-1]), 2))
+
+    def selected_dates(self):
+        return self.days[self.checked].tolist()
+
+    def set_checked(self, checked):
+        """Ustawia zaznaczenie wszystkich aktywnych dni naraz (jedna zmiana zamiast jednej na dzień)."""
+        new = np.where(self.disabled, self.checked, checked)
+        if np.array_equal(new, self.checked):
+            return
+        self.checked = new
+        self.dataChanged.emit(self.index(0, 2), self.index(self.rowCount() - 1, 2), [Qt.CheckStateRole])
+        self.selection_changed.emit()
+
+    def enable_all(self):
+        self.disabled = np.zeros(len(self.days), dtype=bool)
+        if len(self.days):
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, 2))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.days)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if index.column() == 2 and not self.disabled[index.row()]:
+            return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
+        return Qt.ItemIsEnabled
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return self.days[row].astype(datetime.date).strftime("%A, %d %B %Y")
+            if column == 1:
+                return str(self.counts[row])
+        elif role == Qt.CheckStateRole and column == 2:
+            return Qt.Checked if self.checked[row] else Qt.Unchecked
+        elif role == Qt.BackgroundRole and column < 2 and self.disabled[row]:
+            return Qt.lightGray  # Wyszarzony dzień - wszystkie zdjęcia poza zaznaczonym obszarem mapy
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or index.column() != 2 or self.disabled[index.row()]:
+            return False
+        self.checked[index.row()] = value == Qt.Checked
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.selection_changed.emit()
+        return True
+
+
 class TimelineWidget(QWidget):
     date_range_changed = pyqtSignal(list)
 
@@ -12,15 +114,18 @@ class TimelineWidget(QWidget):
         super().__init__(parent)
 
         # Tworzenie tabeli z trzema kolumnami: Date Taken, Number of Photos, Select
-        self.table = QTableWidget(self)
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(['Date Taken', 'Number of Photos', 'Select'])
+        self.model = TimelineModel(self)
+        self.model.selection_changed.connect(self.update_filtered_photos)
+        self.table = QTableView(self)
+        self.table.setModel(self.model)
+        self.table.verticalHeader().setVisible(False)
         self.table.horizontalHeader().setSectionResizeMode(0,
                                                            QHeaderView.ResizeToContents)  # Kolumna daty ma dynamiczną szerokość
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)  # Kolumna ilości zdjęć się rozszerza
         self.table.horizontalHeader().setSectionResizeMode(2,
                                                            QHeaderView.ResizeToContents)  # Kolumna wyboru dostosowuje się do checkboxa
         self.table.setSelectionMode(QAbstractItemView.NoSelection)
+        self.table.horizontalHeader().setResizeContentsPrecision(0)  # Szerokość kolumn tylko z widocznych wierszy
 
         # Ustawienie layoutu dla widgetu
         layout = QVBoxLayout()
@@ -45,114 +150,61 @@ class TimelineWidget(QWidget):
         layout.addLayout(table_layout)
         self.setLayout(layout)
 
-        # Listy do przechowywania zdjęć
-        self.photos = []
-        self.filtered_photos = []
-        self.min_date = None
-        self.max_date = None
+        # Grupowanie po dniach dla każdej grupy: grupa -> (pozycje, DataFrame, dni, numery dni, liczności).
+        # Zależy tylko od przynależności do grupy i dat, więc map_mark i date_mark go nie unieważniają.
+        self.day_cache = {}
 
-    def set_photos(self, df, current_group):
+    def set_photos(self, df, current_group, positions=None):
         """
-        Funkcja przyjmuje cały DataFrame i aktywną grupę,
-        filtruje według tej grupy i wyświetla checkboxy zgodnie z wartościami w kolumnie 'date_mark'.
+        Funkcja przyjmuje cały DataFrame i aktywną grupę (opcjonalnie pozycje jej wierszy z indeksu grup),
+        i wyświetla zaznaczenie dni zgodnie z wartościami w kolumnie 'date_mark'.
         Jeśli wszystkie wiersze dla danej daty mają 'map_mark' na False, wiersz w tabeli robi się szary
         i checkbox jest zablokowany.
         """
-
-        # Filtruj DataFrame na podstawie aktywnej grupy
-        group_df = df[df['Grupa'] == current_group]
-
-        # Tworzenie słownika z datami i informacjami o zdjęciach (map_mark i date_mark)
-        date_dict = {}
-        for index, row in group_df.iterrows():
-            # Konwertowanie na datetime z określonym formatem daty
-            date = pd.to_datetime(row['Data zrobienia zdjęcia'], format='%Y:%m:%d', errors='coerce')
-
-            # Pominięcie wartości NaT
-            if pd.isna(date):
-                continue
-
-            date = date.date()  # Pobierz tylko część daty (bez czasu)
-
-            if date not in date_dict:
-                date_dict[date] = {'count': 0, 'all_map_mark_false': True, 'date_mark': row['date_mark']}
-
-            # Aktualizacja liczby zdjęć dla danej daty
-            date_dict[date]['count'] += 1
-
-            # Jeśli chociaż jedno zdjęcie z tej daty ma map_mark na True, ustaw 'all_map_mark_false' na False
-            if row['map_mark']:
-                date_dict[date]['all_map_mark_false'] = False
-
-        # Sortowanie dat od najnowszej do najstarszej
-        sorted_dates = sorted(date_dict.items(), key=lambda x: x[0], reverse=True)
-
-        # Ustawienie liczby wierszy w tabeli
-        self.table.setRowCount(len(sorted_dates))
-
-        selected_dates = []  # Lista do przechowywania zaznaczonych dat
-
-        for row, (date, data) in enumerate(sorted_dates):
-            # Ustawianie daty w tabeli
-            date_item = QTableWidgetItem(date.strftime("%A, %d %B %Y"))
-            date_item.setFlags(date_item.flags() & ~Qt.ItemIsEditable)
-            self.table.setItem(row, 0, date_item)
-
-            # Ustawianie liczby zdjęć
-            count_item = QTableWidgetItem(str(data['count']))
-            count_item.setFlags(count_item.flags() & ~Qt.ItemIsEditable)
-            self.table.setItem(row, 1, count_item)
-
-            # Tworzenie checkboxa i ustawianie jego stanu zgodnie z wartością w 'date_mark'
-            check_box = QCheckBox(self)
-            check_box.setTristate(False)  # Checkbox ma być dwustanowy
-            check_box.setChecked(data['date_mark'])  # Ustaw checkbox na podstawie wartości w 'date_mark'
-
-            if check_box.isChecked():
-                selected_dates.append(date)  # Dodaj datę do listy zaznaczonych dat
-
-            # Jeśli wszystkie zdjęcia z tej daty mają map_mark na False, zablokuj checkbox i wyszarz wiersz
-            if data['all_map_mark_false']:
-                check_box.setEnabled(False)  # Zablokuj checkbox
-                date_item.setBackground(Qt.lightGray)  # Wyszarz datę
-                count_item.setBackground(Qt.lightGray)  # Wyszarz liczbę zdjęć
-
-            # Podłącz event zmiany stanu checkboxa
-            check_box.stateChanged.connect(self.update_filtered_photos)
-            self.table.setCellWidget(row, 2, check_box)
+        if positions is None:
+            positions = np.flatnonzero((df['Grupa'] == current_group).to_numpy())
+
+        # Wpisy innych wersji DataFrame są już nieaktualne
+        self.day_cache = {group: cached for group, cached in self.day_cache.items() if cached[1] is df}
+        cached = self.day_cache.get(current_group)
+        if cached is None or cached[0] is not positions:
+            cached = (positions, df) + aggregate_days(df['taken_at'].to_numpy()[positions])
+            self.day_cache[current_group] = cached
+        positions, df, days, codes, counts, first = cached
+
+        # Znaczniki dni: map_mark - czy choć jedno zdjęcie dnia jest w zaznaczonym obszarze,
+        # date_mark - wartość pierwszego zdjęcia dnia
+        valid = codes >= 0
+        map_mark = df['map_mark'].to_numpy()[positions]
+        disabled = np.bincount(codes[valid], weights=map_mark[valid], minlength=len(days)) == 0
+        checked = df['date_mark'].to_numpy()[positions][first]
+
+        if days is self.model.days:
+            self.model.update_flags(disabled, checked)  # Te same dni - zmieniły się tylko znaczniki
+        else:
+            self.model.set_days(days, counts, disabled, checked)
 
         # Przekazanie listy zaznaczonych dat do updateSelectedDates
-        self.updateSelectedDates(selected_dates)  # Funkcja updateSelectedDates otrzyma listę zaznaczonych dat
+        self.updateSelectedDates(self.model.selected_dates())  # Funkcja updateSelectedDates otrzyma listę zaznaczonych dat
+
+    def invalidate(self):
+        """Zapomina pogrupowane dni - wywoływane, gdy zmieniły się daty wczytanych plików."""
+        self.day_cache = {}
 
     def select_all_active(self):
         """ Zaznacz wszystkie aktywne checkboxy """
-        for row in range(self.table.rowCount()):
-            checkbox = self.table.cellWidget(row, 2)
-            if checkbox and checkbox.isEnabled():  # Tylko aktywne checkboxy
-                checkbox.setChecked(True)
+        self.model.set_checked(True)
 
     def deselect_all_active(self):
         """ Odznacz wszystkie aktywne checkboxy """
-        for row in range(self.table.rowCount()):
-            checkbox = self.table.cellWidget(row, 2)
-            if checkbox and checkbox.isEnabled():  # Tylko aktywne checkboxy
-                checkbox.setChecked(False)
+        self.model.set_checked(False)
 
     def update_filtered_photos(self):
         """
-        Funkcja aktualizująca listę wybranych (zaznaczonych) dat po zmianie stanu checkboxa.
+        Funkcja przekazuje listę wybranych (zaznaczonych) dat po zmianie stanu checkboxa.
+        Daty pochodzą z modelu, a nie z tekstu wyświetlanego w tabeli.
         """
-        selected_dates = []
-
-        for row in range(self.table.rowCount()):
-            checkbox = self.table.cellWidget(row, 2)
-            if checkbox.isChecked():  # Jeśli checkbox jest zaznaczony
-                date_str = self.table.item(row, 0).text()
-                date = datetime.datetime.strptime(date_str, "%A, %d %B %Y").date()
-                selected_dates.append(date)
-
-        # Wywołaj updateSelectedDates z listą zaznaczonych dat
-        self.updateSelectedDates(selected_dates)
+        self.updateSelectedDates(self.model.selected_dates())
 
     def updateSelectedDates(self, selected_dates):
         #print('TimeLineWidget updateSelectedDates fucion')
@@ -163,18 +215,9 @@ class TimelineWidget(QWidget):
         """
         Przywraca wszystkie kolory w tabeli do domyślnych i aktywuje wszystkie checkboxy.
         """
-        for row in range(self.table.rowCount()):
-            self.table.item(row, 0).setBackground(Qt.white)
-            self.table.item(row, 1).setBackground(Qt.white)
-            checkbox = self.table.cellWidget(row, 2)
-            if checkbox:
-                checkbox.setEnabled(True)
-                checkbox.setStyleSheet("")  # Usuwa szary styl i przywraca normalny wygląd
+        self.model.enable_all()
 
     def clear(self):
-        self.table.clearContents()
-        self.table.setRowCount(0)
-        self.photos = []
-        self.filtered_photos = []
-        self.min_date = None
-        self.max_date = None
+        self.model.set_days(np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype=np.intp),
+                            np.empty(0, dtype=bool), np.empty(0, dtype=bool))
+        self.day_cache = {}
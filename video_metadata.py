@@ -0,0 +1,107 @@
+import atexit
+
+try:
+    import exiftool  # PyExifTool
+except ImportError:
+    exiftool = None
+
+from frames import make_metadata
+
+
+# Tagi potrzebne do metadanych wideo; exiftool zwraca je jako "Grupa:Tag" (opcja -G)
+VIDEO_TAGS = ['GPSLatitude', 'GPSLongitude', 'GPSCoordinates', 'CreateDate', 'MediaCreateDate',
+              'DateTimeOriginal', 'ImageWidth', 'ImageHeight']
+
+# Sesja exiftool (-stay_open) jest jedna na proces roboczy i żyje do jego zakończenia
+_session = None
+_session_failed = False
+
+
+def get_session():
+    """Zwraca działającą sesję exiftool albo None, gdy PyExifTool lub exiftool nie są dostępne."""
+    global _session, _session_failed
+    if exiftool is None or _session_failed:
+        return None
+
+    if _session is None:
+        try:
+            # -n: liczby zamiast opisów (współrzędne jako ułamki dziesiętne ze znakiem)
+            session = exiftool.ExifToolHelper(common_args=['-G', '-n'])
+            session.run()
+        except Exception:
+            _session_failed = True  # Brak programu exiftool - zostajemy przy ffprobe
+            return None
+        _session = session
+        atexit.register(close_session)
+    return _session
+
+
+def close_session():
+    global _session
+    if _session is not None:
+        try:
+            _session.terminate()
+        except Exception:
+            pass
+        _session = None
+
+
+def read_video_metadata_batch(paths):
+    """
+    Odczytuje metadane paczki plików wideo jednym zapytaniem do sesji exiftool.
+    Zwraca słownik ścieżka -> metadane w tym samym kształcie co get_video_metadata.
+    Pliki, których exiftool nie odczytał, są pomijane (obsłuży je ffprobe).
+    """
+    session = get_session()
+    if session is None or not paths:
+        return {}
+
+    try:
+        results = session.get_tags(paths, tags=VIDEO_TAGS)
+        if len(results) != len(paths):
+            raise ValueError("Unexpected number of exiftool results")
+        pairs = list(zip(paths, results))
+    except Exception:
+        # Jeden uszkodzony plik psuje całą paczkę - ponawiamy pojedynczo
+        pairs = []
+        for path in paths:
+            try:
+                pairs.append((path, session.get_tags(path, tags=VIDEO_TAGS)[0]))
+            except Exception:
+                continue
+
+    return {path: parse_exiftool_tags(path, tags) for path, tags in pairs}
+
+
+def parse_exiftool_tags(filepath, tags):
+    # Usuwamy prefiks grupy ("QuickTime:CreateDate" -> "CreateDate")
+    values = {}
+    for key, value in tags.items():
+        values.setdefault(key.split(':')[-1], value)
+
+    lat, lon = values.get('GPSLatitude'), values.get('GPSLongitude')
+    if (lat is None or lon is None) and isinstance(values.get('GPSCoordinates'), str):
+        parts = values['GPSCoordinates'].split()
+        if len(parts) >= 2:
+            lat, lon = parts[0], parts[1]
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        lat, lon = None, None
+
+    date_taken, time_taken = 'Unknown', 'Unknown'
+    for name in ('CreateDate', 'MediaCreateDate', 'DateTimeOriginal'):
+        value = str(values.get(name, ''))
+        # QuickTime zapisuje 0000:00:00 00:00:00, gdy data nie została ustawiona
+        if value and not value.startswith('0000'):
+            date_time = value.split()
+            date_taken = date_time[0]
+            time_taken = date_time[1].split('+')[0].split('-')[0].split('.')[0] if len(date_time) > 1 else 'Unknown'
+            break
+
+    try:
+        width, height = int(values.get('ImageWidth')), int(values.get('ImageHeight'))
+    except (TypeError, ValueError):
+        width, height = None, None
+
+    return make_metadata(filepath, width, height, lat, lon, date_taken, time_taken)
@@ -0,0 +1,153 @@
+import os
+import io
+import time
+import shutil
+import platform
+import subprocess
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+from PIL import Image, ImageStat
+
+
+# Sekunda filmu, z której bierzemy klatkę (pierwsza klatka bywa czarna)
+POSTER_OFFSET = 1.0
+# Maksymalny czas (w sekundach) na wyciągnięcie klatki z jednego pliku
+POSTER_TIME_BUDGET = 5.0
+# Klatki o średniej jasności poniżej tego progu uznajemy za czarne
+DARK_FRAME_THRESHOLD = 16
+# Liczba równoległych dekodowań w jednym procesie roboczym (ffmpeg działa w osobnym procesie)
+POSTER_THREADS = 4
+# Łączny limit dekodowań we wszystkich procesach puli - bez niego byłoby ich do POSTER_THREADS x liczba rdzeni
+MAX_POSTER_DECODES = os.cpu_count() or 1
+
+# Semafor wspólny dla procesów puli (ustawiany przez set_decode_slots przy starcie procesu)
+decode_slots = None
+
+
+def set_decode_slots(slots):
+    """Inicjalizator procesu roboczego: zapamiętuje semafor ograniczający łączną liczbę dekodowań."""
+    global decode_slots
+    decode_slots = slots
+
+
+def get_ffmpeg_path():
+    """Zwraca ścieżkę do ffmpeg z katalogu ffmpeg-binaries albo z PATH; None, gdy go brak."""
+    system = platform.system()
+    if system == "Linux":
+        path = os.path.join("ffmpeg-binaries", "linux", "ffmpeg")
+    elif system == "Darwin":  # macOS
+        path = os.path.join("ffmpeg-binaries", "macos", "ffmpeg")
+    elif system == "Windows":
+        path = os.path.join("ffmpeg-binaries", "windows", "ffmpeg.exe")
+    else:
+        raise Exception(f"Unsupported system: {system}")
+
+    if os.path.exists(path):
+        return path
+    return shutil.which('ffmpeg')
+
+
+def is_dark(img):
+    return sum(ImageStat.Stat(img.convert('L')).mean) < DARK_FRAME_THRESHOLD
+
+
+def grab_frame_ffmpeg(ffmpeg, filepath, offset, size, timeout):
+    """
+    Dekoduje jedną klatkę kluczową od podanej sekundy, od razu przeskalowaną przez filtr scale.
+    -ss przed -i przewija do klatki kluczowej bez dekodowania poprzedzających klatek,
+    a -skip_frame nokey pomija dekodowanie klatek pośrednich.
+    """
+    command = [
+        ffmpeg, '-v', 'error', '-threads', '1', '-skip_frame', 'nokey',
+        '-ss', f'{offset:.3f}', '-i', filepath,
+        '-an', '-sn', '-frames:v', '1',
+        '-vf', f'scale={size[0]}:{size[1]}:force_original_aspect_ratio=decrease',
+        '-f', 'image2pipe', '-vcodec', 'bmp', '-'
+    ]
+    kwargs = {'creationflags': subprocess.CREATE_NO_WINDOW} if platform.system() == "Windows" else {}
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=timeout, **kwargs)
+    if not result.stdout:
+        return None  # Film krótszy niż offset albo nieczytelny strumień
+    img = Image.open(io.BytesIO(result.stdout))
+    img.load()
+    return img
+
+
+def grab_frame_cv2(filepath, offset, size, deadline):
+    """Zapasowa ścieżka bez ffmpeg: przewinięcie przez cv2 i dekodowanie jednej klatki."""
+    cap = cv2.VideoCapture(filepath)
+    try:
+        if not cap.isOpened():
+            return None
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+        if fps > 0 and frames > 0:
+            offset = min(offset, frames / fps / 2)  # Krótkie klipy: najwyżej połowa długości
+        if offset > 0:
+            cap.set(cv2.CAP_PROP_POS_MSEC, offset * 1000)
+        if time.monotonic() > deadline:
+            return None
+
+        ret, frame = cap.read()
+        if not ret:
+            return None
+        img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        img.thumbnail(size)
+        return img
+    finally:
+        cap.release()
+
+
+def create_poster_frame(filepath, size, offset=POSTER_OFFSET, budget=POSTER_TIME_BUDGET):
+    """
+    Zwraca klatkę filmu (obraz PIL) w rozmiarze nie większym niż size.
+    Próbuje klatki kluczowej z podanej sekundy, a gdy jest czarna - późniejszej.
+    Gdy nic nie uda się w limicie czasu, zwraca None - film nie dostaje miniaturki w cache,
+    więc przy następnym wczytaniu katalogu klatka zostanie wyciągnięta ponownie
+    (w siatce do tego czasu widać szary prostokąt brakującej miniaturki).
+    """
+    # Limit czasu liczymy od uzyskania miejsca w puli dekodowań, a nie od czekania na nie
+    with decode_slots if decode_slots is not None else nullcontext():
+        return grab_poster_frame(filepath, size, offset, budget)
+
+
+def grab_poster_frame(filepath, size, offset, budget):
+    """Właściwe wyciąganie klatki - kolejne próby mieszczą się w limicie czasu budget."""
+    deadline = time.monotonic() + budget
+    ffmpeg = get_ffmpeg_path()
+    frame = None
+
+    for attempt_offset in (offset, offset * 3, 0.0):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            if ffmpeg:
+                candidate = grab_frame_ffmpeg(ffmpeg, filepath, attempt_offset, size, remaining)
+            else:
+                candidate = grab_frame_cv2(filepath, attempt_offset, size, deadline)
+        except subprocess.TimeoutExpired:
+            break
+        except Exception:
+            candidate = None
+
+        if candidate is None:
+            continue
+        if not is_dark(candidate):
+            frame = candidate
+            break
+        if frame is None:
+            frame = candidate  # Czarna klatka jest lepsza niż żadna
+
+    return frame
+
+
+def create_poster_frames(filepaths, size):
+    """Tworzy klatki dla paczki filmów równolegle; zwraca słownik ścieżka -> obraz PIL (None, gdy się nie udało)."""
+    if not filepaths:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(POSTER_THREADS, len(filepaths))) as executor:
+        frames = executor.map(lambda path: create_poster_frame(path, size), filepaths)
+        return dict(zip(filepaths, frames))
@@ -0,0 +1,233 @@
+import os
+import time
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QThread, QTimer, pyqtSignal
+
+from scanner import MediaScanner
+
+
+# Zmiany zbieramy przez tyle milisekund ciszy, zanim przeskanujemy katalogi
+WATCH_DEBOUNCE_MS = 1000
+# Przy ciągłym kopiowaniu skanujemy najpóźniej po tylu milisekundach od pierwszej zmiany
+WATCH_MAX_DELAY_MS = 5000
+# Pliki zmodyfikowane w ciągu ostatnich sekund uznajemy za jeszcze kopiowane i sprawdzamy później
+WATCH_SETTLE_SECONDS = 2.0
+# Nadpisanie pliku w miejscu nie zmienia katalogu, więc co jakiś czas porównujemy wszystkie katalogi
+WATCH_SWEEP_INTERVAL_MS = 5 * 60 * 1000
+
+
+class DirectoryScanWorker(QObject):
+    """
+    Porównuje zawartość katalogów z zapamiętanym stanem (rozmiar i czas modyfikacji).
+    Obiekt jest przenoszony do osobnego QThread - os.scandir, stat i skanowanie nowych
+    podkatalogów (np. na wolnym dysku sieciowym) nie blokują GUI. Stan plików należy
+    wyłącznie do tego wątku; GUI dostaje tylko listy ścieżek w sygnale scanned.
+    """
+    # zmienione pliki, usunięte pliki, katalogi z plikami w trakcie kopiowania,
+    # nowe katalogi do obserwowania, katalogi, które zniknęły
+    scanned = pyqtSignal(list, list, list, list, list)
+
+    def __init__(self, extensions):
+        super().__init__()
+        self.extensions = tuple(extensions)
+        # katalog -> {ścieżka: (rozmiar, mtime_ns)}
+        self.files = {}
+        self.directories = set()
+        self.visited = set()  # (urządzenie, i-węzeł) obserwowanych katalogów - chroni przed pętlami dowiązań
+        self._cancelled = False
+
+    def cancel(self):
+        """Przerywa bieżące porównywanie po skończeniu katalogu, który jest właśnie czytany."""
+        self._cancelled = True
+
+    def add_snapshot(self, snapshot, directories):
+        """Dołącza stan plików i katalogi katalogu głównego sesji (z pełnego skanu IngestWorker)."""
+        for path, stat in snapshot.items():
+            self.files.setdefault(os.path.dirname(path), {})[path] = stat
+        self.add_directories(directories)
+
+    def add_directories(self, directories):
+        new = [directory for directory in directories if directory not in self.directories]
+        for directory in new:
+            try:
+                stat = os.stat(directory)
+                self.visited.add((stat.st_dev, stat.st_ino))
+            except OSError:
+                pass
+        self.directories.update(new)
+        return new
+
+    def remove_directory(self, directory, removed_directories):
+        """Zapomina katalog (i jego podkatalogi); zwraca pliki, które w nich były."""
+        prefix = directory + os.sep
+        removed = []
+        for known in [d for d in self.directories if d == directory or d.startswith(prefix)]:
+            self.directories.discard(known)
+            removed_directories.append(known)
+            removed.extend(self.files.pop(known, {}))
+        return removed
+
+    def rescan(self, dirty):
+        changed, removed, unsettled = [], [], set()
+        added_directories, removed_directories = [], []
+        now = time.time()
+
+        for directory in dirty:
+            if self._cancelled:
+                return
+            if directory not in self.directories:
+                continue  # Katalog usunięty razem z katalogiem nadrzędnym
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = list(iterator)
+            except OSError:
+                # Katalog zniknął - wszystkie jego pliki (także z podkatalogów) są usuwane
+                removed.extend(self.remove_directory(directory, removed_directories))
+                continue
+
+            known = self.files.get(directory, {})
+            current = {}
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        if entry.path not in self.directories:
+                            changed.extend(self.scan_new_directory(entry.path, now, unsettled, added_directories))
+                    elif entry.name.lower().endswith(self.extensions) and entry.is_file():
+                        stat = entry.stat()
+                        if now - stat.st_mtime < WATCH_SETTLE_SECONDS:
+                            # Plik jest jeszcze kopiowany - zostawiamy poprzedni stan i wracamy do katalogu później
+                            unsettled.add(directory)
+                            if entry.path in known:
+                                current[entry.path] = known[entry.path]
+                            continue
+                        current[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                        if known.get(entry.path) != current[entry.path]:
+                            changed.append(entry.path)
+                except OSError:
+                    continue
+
+            removed.extend(path for path in known if path not in current)
+            self.files[directory] = current
+
+        self.scanned.emit(changed, removed, sorted(unsettled), added_directories, removed_directories)
+
+    def scan_new_directory(self, directory, now, unsettled, added_directories):
+        """Skanuje nowy podkatalog (np. skopiowany w całości); jego katalogi trafiają do added_directories."""
+        scanner = MediaScanner(directory, self.extensions, visited=self.visited)
+        found = []
+        for path, stat in scanner:
+            parent = os.path.dirname(path)
+            self.files.setdefault(parent, {})
+            if now - stat.st_mtime < WATCH_SETTLE_SECONDS:
+                unsettled.add(parent)  # Wczytamy go, gdy kopiowanie się skończy
+                continue
+            self.files[parent][path] = (stat.st_size, stat.st_mtime_ns)
+            found.append(path)
+        added_directories.extend(self.add_directories(scanner.directories))
+        return found
+
+
+class DirectoryWatcher(QObject):
+    """
+    Obserwuje wczytany katalog (QFileSystemWatcher, na Linuksie inotify) i po każdej
+    serii zmian zleca DirectoryScanWorker porównanie zmienionych katalogów z zapamiętanym
+    stanem. Nie otwiera plików - jedynie os.scandir zmienionych katalogów, w osobnym wątku.
+    Zmian wewnątrz pliku (nadpisanie w miejscu) system nie zgłasza dla katalogu, dlatego
+    co WATCH_SWEEP_INTERVAL_MS porównywane są wszystkie katalogi.
+    """
+    files_changed = pyqtSignal(list)  # nowe lub zmodyfikowane pliki do wczytania
+    files_removed = pyqtSignal(list)  # pliki, które zniknęły z katalogu
+    scan_requested = pyqtSignal(list)  # katalogi do porównania (do wątku roboczego)
+    snapshot_added = pyqtSignal(object, list)  # stan plików i katalogi kolejnego katalogu głównego
+
+    def __init__(self, snapshot, directories, extensions, parent=None):
+        super().__init__(parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.directories = set()  # katalogi obserwowane przez QFileSystemWatcher
+
+        self.scan_thread = QThread(self)
+        self.scan_worker = DirectoryScanWorker(extensions)
+        self.scan_worker.moveToThread(self.scan_thread)
+        self.scan_requested.connect(self.scan_worker.rescan)
+        self.snapshot_added.connect(self.scan_worker.add_snapshot)
+        self.scan_worker.scanned.connect(self.on_scanned)
+        self.scan_thread.finished.connect(self.scan_worker.deleteLater)
+        self.scan_thread.start()
+        self.scanning = False  # porównanie zlecone i jeszcze niezakończone
+
+        self.dirty = set()  # katalogi zmienione od ostatniego skanu
+        self.first_change = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.rescan)
+
+        self.sweep_timer = QTimer(self)
+        self.sweep_timer.timeout.connect(self.start_sweep)
+        self.sweep_timer.start(WATCH_SWEEP_INTERVAL_MS)
+
+        self.add_snapshot(snapshot, directories)
+
+    def add_snapshot(self, snapshot, directories):
+        """Dołącza stan plików i katalogi kolejnego katalogu głównego sesji."""
+        self.watch(directories)
+        self.snapshot_added.emit(snapshot, list(directories))
+
+    def watch(self, directories):
+        new = [directory for directory in directories if directory not in self.directories]
+        self.directories.update(new)
+        if new:
+            self.watcher.addPaths(new)
+
+    def unwatch(self, directories):
+        gone = [directory for directory in directories if directory in self.directories]
+        self.directories.difference_update(gone)
+        if gone:
+            self.watcher.removePaths(gone)
+
+    def stop(self):
+        self.timer.stop()
+        self.sweep_timer.stop()
+        self.scan_worker.cancel()
+        self.scan_thread.quit()
+        self.scan_thread.wait()
+        if self.directories:
+            self.watcher.removePaths(list(self.directories))
+        self.directories = set()
+
+    def on_directory_changed(self, directory):
+        self.dirty.add(directory)
+        now = time.monotonic()
+        if self.first_change is None:
+            self.first_change = now
+        waited = (now - self.first_change) * 1000
+        self.timer.start(int(max(0, min(WATCH_DEBOUNCE_MS, WATCH_MAX_DELAY_MS - waited))))
+
+    def start_sweep(self):
+        self.dirty.update(self.directories)
+        self.rescan()
+
+    def rescan(self):
+        if self.scanning or not self.dirty:
+            return  # Zmiany zebrane w trakcie porównywania wyślemy po jego zakończeniu
+        dirty, self.dirty = self.dirty, set()
+        self.first_change = None
+        self.scanning = True
+        self.scan_requested.emit(sorted(dirty))
+
+    def on_scanned(self, changed, removed, unsettled, added_directories, removed_directories):
+        self.scanning = False
+        self.unwatch(removed_directories)
+        self.watch(added_directories)
+
+        if unsettled:
+            self.dirty.update(unsettled)
+            self.first_change = time.monotonic()
+            self.timer.start(WATCH_DEBOUNCE_MS)
+        elif self.dirty and not self.timer.isActive():
+            self.rescan()
+
+        if removed:
+            self.files_removed.emit(removed)
+        if changed:
+            self.files_changed.emit(changed)